@@ -1,24 +1,49 @@
 import streamlit as st
-import pandas as pd
 import os
 import extract
 import transform
 import load
+import query
+import sync
+from store import DEFAULT_BUDGET_MB, GraphStore
+from metrics import metrics
+import hashlib
 import json
 from datetime import datetime
-import networkx as nx
-import plotly.graph_objects as go
 import random
-import requests
-import numpy as np
 import logging
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    # Plotting and data libraries are imported where they are used, so a
+    # rerun that doesn't draw a graph or a table doesn't pay for them
+    import networkx as nx
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# Number of records per table shown for each extracted snapshot
+PREVIEW_ROWS = 5
+
+
+class LabeledProgress:
+    """Streamlit progress bar that keeps its label when updated"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self._bar = st.progress(0.0, text=label)
+
+    def progress(self, value: float):
+        self._bar.progress(value, text=self.label)
+
+    def empty(self):
+        self._bar.empty()
+
 
 def display_graph_stats(G):
     """Display graph statistics"""
+    import pandas as pd
+
     col1, col2 = st.columns(2)
 
     with col1:
@@ -71,15 +96,23 @@ def display_graph_stats(G):
             st.dataframe(pd.DataFrame(edge_stats))
 
 
-def display_graph(G: nx.Graph, timestamp: str = "", max_nodes: int = 50):
+def display_graph(G: "nx.Graph", timestamp: str = "", max_nodes: int = 50, nodes=None):
     """Display graph using Plotly"""
+    import networkx as nx
+    import plotly.graph_objects as go
+
     # Create a new graph for visualization
     vis_graph = nx.Graph()
 
-    # Randomly sample nodes if there are too many
-    nodes_to_show = list(G.nodes())
-    if len(nodes_to_show) > max_nodes:
-        nodes_to_show = random.sample(nodes_to_show, max_nodes)
+    if nodes is not None:
+        # Show the given nodes, e.g. the result of a search
+        nodes_to_show = set(list(nodes)[:max_nodes])
+    else:
+        # Randomly sample nodes if there are too many
+        nodes_to_show = list(G.nodes())
+        if len(nodes_to_show) > max_nodes:
+            nodes_to_show = random.sample(nodes_to_show, max_nodes)
+        nodes_to_show = set(nodes_to_show)
 
     # Add selected nodes and their edges
     for node in nodes_to_show:
@@ -169,6 +202,9 @@ def display_graph(G: nx.Graph, timestamp: str = "", max_nodes: int = 50):
 
 def clean_graph_data(G):
     """Clean graph data to ensure JSON compatibility"""
+    import numpy as np
+    import pandas as pd
+
     # Clean node attributes
     for node in G.nodes():
         attrs = G.nodes[node]
@@ -190,8 +226,141 @@ def clean_graph_data(G):
     return G
 
 
+def display_metrics():
+    """Display per-stage and per-request performance metrics"""
+    import pandas as pd
+
+    data = metrics.to_dict()
+    if not data["stages"] and not data["requests"]:
+        return
+
+    with st.expander("Performance Metrics"):
+        if data["stages"]:
+            st.subheader("Stages")
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {
+                            "Stage": stage,
+                            "Calls": stats["calls"],
+                            "Seconds": round(stats["seconds"], 3),
+                            "Items": stats["items"],
+                            "Items/s": round(stats["items_per_second"] or 0, 1),
+                            "Bytes Sent": stats["bytes"],
+                        }
+                        for stage, stats in data["stages"].items()
+                    ]
+                )
+            )
+
+        if data["requests"]:
+            st.subheader("Requests")
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {
+                            "Endpoint": endpoint,
+                            "Count": stats["count"],
+                            "Failed": stats["failed"],
+                            "Mean Latency (ms)": round((stats["mean_seconds"] or 0) * 1000, 1),
+                            "Bytes Sent": stats["bytes_sent"],
+                        }
+                        for endpoint, stats in data["requests"].items()
+                    ]
+                )
+            )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "Download JSON", metrics.to_json(), file_name="metrics.json"
+            )
+        with col2:
+            st.download_button(
+                "Download Prometheus", metrics.to_prometheus(), file_name="metrics.prom"
+            )
+
+
+@st.cache_resource(max_entries=4)
+def _cached_graph_index(source: tuple, _G: "nx.Graph") -> query.GraphIndex:
+    # Unbound, so the cache doesn't keep graphs alive outside the store
+    return query.GraphIndex(_G).bind(None)
+
+
+def graph_index(source: tuple, G: "nx.Graph") -> query.GraphIndex:
+    """
+    Index of a graph, kept across reruns
+
+    The graph is rebuilt on every rerun, so the index is cached by the content
+    the graph was built from (data file and schema digests) rather than the
+    graph object, and bound to the current graph when used.
+    """
+    return _cached_graph_index(source, G).bind(G)
+
+
+def search_graph(G: "nx.Graph", max_nodes: int, source: tuple):
+    """
+    Search box for finding nodes and their neighborhoods
+
+    Args:
+        G: Graph to search
+        max_nodes: Maximum number of nodes to return
+        source: Identifies what G was built from, used to cache its index
+
+    Returns:
+        List of nodes to display, or None if no search was made
+    """
+    index = graph_index(source, G)
+
+    col1, col2, col3 = st.columns([2, 3, 1])
+    with col1:
+        node_type = st.selectbox("Node type", options=["Any"] + index.node_types)
+    with col2:
+        text = st.text_input(
+            "Search",
+            placeholder="Primary key, or attribute=value; attribute=value",
+        )
+    with col3:
+        hops = st.number_input("Hops", min_value=0, max_value=5, value=1)
+
+    if not text.strip():
+        return None
+
+    node_type = None if node_type == "Any" else node_type
+    parsed = query.parse_query(text)
+    if "key" in parsed:
+        types = [node_type] if node_type else index.node_types
+        matches = [
+            node
+            for node in (index.lookup(t, parsed["key"]) for t in types)
+            if node is not None
+        ]
+    else:
+        matches = index.find(
+            node_type=node_type, limit=max_nodes, filters=parsed["filters"]
+        )
+
+    if not matches:
+        st.warning(f"No nodes found for '{text}'")
+        return None
+
+    st.write(f"Found {len(matches)} matching node(s)")
+    nodes = []
+    seen = set()
+    for match in matches:
+        for node in index.neighborhood(match, hops=hops, max_nodes=max_nodes):
+            if node not in seen:
+                seen.add(node)
+                nodes.append(node)
+        if len(nodes) >= max_nodes:
+            break
+
+    return nodes
+
+
 def main():
     st.title("Graph ETL Pipeline")
+    metrics.reset()
 
     # Create cache directory if it doesn't exist
     if not os.path.exists("cache"):
@@ -215,6 +384,7 @@ def main():
 
     # Save data files
     data_to_process = []
+    digests = {}
     for data_file in sorted(data_files, key=lambda x: x.name):
         try:
             timestamp = int(os.path.splitext(data_file.name)[0])
@@ -222,18 +392,56 @@ def main():
             if not os.path.exists(timestamp_dir):
                 os.makedirs(timestamp_dir)
             filepath = os.path.join(timestamp_dir, data_file.name)
+            content = data_file.getvalue()
             with open(filepath, "wb") as f:
-                f.write(data_file.getvalue())
+                f.write(content)
             data_to_process.append(filepath)
+            digests[filepath] = hashlib.sha1(content).hexdigest()
         except ValueError:
             st.error(
                 f"Invalid filename format for {data_file.name}. Expected timestamp."
             )
             return
 
+    # Keep recently used snapshots in memory and spill the rest to disk
+    budget_mb = st.sidebar.number_input(
+        "Memory budget (MB)",
+        min_value=16,
+        value=int(DEFAULT_BUDGET_MB),
+        step=64,
+        help="Extracted data and graphs beyond this budget are spilled to disk and reloaded on demand",
+    )
+    snapshots = GraphStore(budget_mb=budget_mb, spill_root="cache/store")
+    try:
+        process_snapshots(schema, data_to_process, digests, snapshots)
+    finally:
+        # The store is rebuilt on every rerun, don't leave its spill files behind
+        snapshots.close()
+
+
+def process_snapshots(
+    schema: Dict,
+    data_to_process: List[str],
+    digests: Dict[str, str],
+    snapshots: GraphStore,
+):
+    """
+    Extract, transform, display and load uploaded snapshots kept in a store
+
+    Args:
+        schema: Graph schema
+        data_to_process: Paths of the uploaded ZIP files
+        digests: SHA-1 digest of each uploaded file's content, by path
+        snapshots: Store for extracted data and built graphs
+    """
+    # validate imports pandas and numpy at module level
+    import validate
+
     # Section 2: Extract
     st.header("2. Extract")
-    extracted_data = {}
+    extracted_timestamps = []
+    snapshot_files = {}
+    plan = extract.compile_plan(schema)
 
     for data_file in data_to_process:
         timestamp = os.path.splitext(os.path.basename(data_file))[0]
@@ -243,9 +451,17 @@ def main():
 
         with st.expander(f"Data at {display_time}"):
             try:
-                data = extract.read_zip(data_file)
-                extracted_data[timestamp] = data
-                st.json(json.loads(json.dumps(data, cls=load.NaNEncoder)))
+                data = extract.read_zip(data_file, plan)
+                snapshots[("data", timestamp)] = data
+                extracted_timestamps.append(timestamp)
+                snapshot_files[timestamp] = data_file
+                # Full snapshots would be serialized into Streamlit's message
+                # cache outside the store's budget, show a bounded preview
+                preview = {
+                    type_name: {"rows": len(records), "first_rows": records[:PREVIEW_ROWS]}
+                    for type_name, records in data.items()
+                }
+                st.json(json.loads(json.dumps(preview, cls=load.NaNEncoder)))
             except Exception as e:
                 st.error(f"Error extracting data from {data_file}: {str(e)}")
                 continue
@@ -254,19 +470,33 @@ def main():
     st.header("3. Transform")
 
     # Sort timestamps to ensure ordered processing
-    all_timestamps = sorted(extracted_data.keys())
+    all_timestamps = sorted(extracted_timestamps)
     debug_info = st.empty()
     debug_info.info(
         f"Found {len(all_timestamps)} timestamps to process: {all_timestamps}"
     )
 
+    # Check key quality before spending time on building and uploading
+    for timestamp in all_timestamps:
+        report = validate.validate_data(snapshots[("data", timestamp)], schema)
+        if not report["valid"]:
+            display_time = datetime.fromtimestamp(int(timestamp)).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+            with st.expander(
+                f"Validation: {len(report['issues'])} issue(s) at {display_time}"
+            ):
+                for issue in report["issues"]:
+                    st.warning(issue)
+
     # Process all graphs first
-    graphs = {}
+    graph_timestamps = []
     for timestamp in all_timestamps:
         try:
-            # Build graph
-            G = transform.build_graph(extracted_data[timestamp], schema)
-            graphs[timestamp] = G
+            # Build graph; the extracted data isn't needed once it is built
+            G = transform.build_graph(snapshots.pop(("data", timestamp)), schema)
+            snapshots[("graph", timestamp)] = G
+            graph_timestamps.append(timestamp)
             logger.info(
                 f"Built graph for timestamp {timestamp}: Nodes={len(G.nodes)}, Edges={len(G.edges)}"
             )
@@ -280,7 +510,7 @@ def main():
     with col1:
         selected_timestamp = st.selectbox(
             "Select timestamp to visualize",
-            options=all_timestamps,
+            options=graph_timestamps,
             format_func=lambda x: datetime.fromtimestamp(int(x)).strftime(
                 "%Y-%m-%d %H:%M:%S"
             ),
@@ -297,24 +527,41 @@ def main():
         )
         st.subheader(f"Graph at {display_time}")
 
-        G = graphs[selected_timestamp]
+        G = snapshots[("graph", selected_timestamp)]
         # Display statistics and graph
         display_graph_stats(G)
-        display_graph(G, timestamp=display_time, max_nodes=max_nodes)
+        source = (digests[snapshot_files[selected_timestamp]], load.payload_checksum(schema))
+        search_nodes = search_graph(G, max_nodes, source)
+        display_graph(G, timestamp=display_time, max_nodes=max_nodes, nodes=search_nodes)
 
     # Section 4: Load
     st.header("4. Load")
 
     col1, col2 = st.columns(2)
     with col1:
-        version = st.text_input("Version", value="v1")
+        version_input = st.text_input(
+            "Version", value="v1", help="Separate several versions with commas"
+        )
+        versions = [v.strip() for v in version_input.split(",") if v.strip()] or ["v1"]
     with col2:
         batch_size = st.number_input(
             "Batch Size", min_value=100, max_value=10000, value=1000, step=100
         )
 
+    verify_after_upload = st.checkbox(
+        "Verify upload against server stats",
+        value=False,
+        help="Wait for the server queue to drain and compare node and edge counts",
+    )
+
+    sync_with_server = st.checkbox(
+        "Sync with server state",
+        value=False,
+        help="Fetch the live graph of the version and upload only the nodes and edges that differ",
+    )
+
     if st.button("Upload to Server"):
-        if not graphs:
+        if not graph_timestamps:
             st.error("No graphs to upload. Please process some data first.")
             return
 
@@ -331,7 +578,7 @@ def main():
 
         try:
             # Sort timestamps to ensure ordered processing
-            timestamps = sorted(graphs.keys())
+            timestamps = graph_timestamps
             total_graphs = len(timestamps)
             logger.info(
                 f"Found {total_graphs} graphs to process with timestamps: {timestamps}"
@@ -343,7 +590,7 @@ def main():
             )
 
             for idx, timestamp in enumerate(timestamps):
-                G = graphs[timestamp]
+                G = snapshots[("graph", timestamp)]
                 display_time = datetime.fromtimestamp(int(timestamp)).strftime(
                     "%Y-%m-%d %H:%M:%S"
                 )
@@ -356,41 +603,76 @@ def main():
                     f"Processing graph {idx + 1}/{total_graphs} ({display_time})..."
                 )
 
-                # Convert graph to JSON
-                graph_data = nx.node_link_data(G)
-
-                # Prepare data for upload
-                upload_data = {
-                    "timestamp": int(timestamp),  # Ensure timestamp is an integer
-                    "graph": graph_data,
-                }
-
                 # Upload to server - first timestamp uses bulk_create, others use bulk_update
                 is_first_timestamp = idx == 0
                 logger.info(f"Uploading with is_first_timestamp={is_first_timestamp}")
 
-                response = load.upload_to_server(
-                    upload_data,
-                    version=version,
-                    batch_size=batch_size,
-                    is_first_timestamp=is_first_timestamp,
-                )
-
-                if response.get("success"):
-                    action = "Created" if is_first_timestamp else "Updated"
-                    message = (
-                        f"{action} graph for {display_time}: {response.get('message')}"
+                # Hand the built graph over directly, reusing the checked server
+                if len(versions) > 1 and not sync_with_server:
+                    responses = load.upload_graph_to_versions(
+                        G,
+                        int(timestamp),
+                        versions,
+                        batch_size=batch_size,
+                        progress_bars={v: LabeledProgress(v) for v in versions},
+                        server=server,
                     )
-                    st.success(message)
-                    logger.info(message)
                 else:
-                    error = f"Failed to upload graph for {display_time}: {response.get('error')}"
-                    st.error(error)
-                    logger.error(error)
+                    responses = {}
+                    for version in versions:
+                        if sync_with_server:
+                            responses[version] = sync.sync_graph(
+                                G,
+                                version,
+                                int(timestamp),
+                                server=server,
+                                batch_size=batch_size,
+                                progress_bar=LabeledProgress(version),
+                            )
+                        else:
+                            responses[version] = load.upload_graph(
+                                G,
+                                int(timestamp),
+                                version=version,
+                                batch_size=batch_size,
+                                is_first_timestamp=is_first_timestamp,
+                                server=server,
+                            )
+
+                for version, response in responses.items():
+                    if response.get("success"):
+                        if sync_with_server:
+                            action = "Synced"
+                        else:
+                            action = "Created" if is_first_timestamp else "Updated"
+                        message = f"{action} graph for {display_time} in {version}: {response.get('message')}"
+                        st.success(message)
+                        logger.info(message)
+                    else:
+                        error = f"Failed to upload graph for {display_time} to {version}: {response.get('error')}"
+                        st.error(error)
+                        logger.error(error)
 
                 # Update overall progress
                 overall_progress.progress((idx + 1) / total_graphs)
 
+            if verify_after_upload:
+                status_text.write("Verifying upload against server stats...")
+                for version in versions:
+                    report = load.verify_upload(
+                        snapshots[("graph", timestamps[-1])], version, server=server
+                    )
+                    if report["success"]:
+                        st.success(
+                            f"Verification passed: {version} counts match the local graph"
+                        )
+                    elif report.get("error"):
+                        st.error(report["error"])
+                    else:
+                        st.warning(f"Verification of {version} found discrepancies:")
+                        for discrepancy in report["discrepancies"]:
+                            st.write(f"- {discrepancy}")
+
         except Exception as e:
             error = f"Error uploading to server: {str(e)}"
             st.error(error)
@@ -402,6 +684,14 @@ def main():
             status_text.empty()
             debug_container.empty()
 
+    store_stats = snapshots.stats()
+    st.sidebar.caption(
+        f"Snapshots: {store_stats['in_memory']} in memory "
+        f"(~{store_stats['memory_bytes'] / 2**20:.0f} MB), "
+        f"{store_stats['spilled']} on disk ({store_stats['disk_bytes'] / 2**20:.0f} MB)"
+    )
+    display_metrics()
+
 
 if __name__ == "__main__":
     main()
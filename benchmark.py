@@ -0,0 +1,579 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+import extract
+import transform
+import load
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["read_zip", "read_xlsx", "build_graph", "export_features", "send_graph"]
+
+# Share of the row budget given to node tables; edge tables get the rest
+NODE_SHARE = 0.3
+
+# Excel sheets cannot hold more rows than this
+XLSX_MAX_ROWS = 1_048_575
+
+# Import-time budget of the core APIs in milliseconds, as cumulative
+# `python -X importtime` time; none of them may import HEAVY_MODULES eagerly
+IMPORT_BUDGET_MS = {"extract": 50, "transform": 50, "load": 50, "pipeline": 100}
+HEAVY_MODULES = ["streamlit", "plotly", "pandas", "numpy", "networkx", "requests"]
+
+GROUPS = ["PN", "X", "KIT", "ASSY", "RAW"]
+COUNTRIES = ["US", "DE", "CN", "IN", "MX"]
+
+
+def _file_name(type_name: str) -> str:
+    """File name used for a type in the sample ZIPs, e.g. 'part to part'"""
+    return type_name.replace("_", " ")
+
+
+def _make_keys(node_type: str, count: int, numeric: bool = False) -> np.ndarray:
+    """Primary key values for a node type, integers if numeric"""
+    if numeric:
+        return np.arange(1, count + 1)
+    return np.array([f"{node_type[:3].upper()}{i}-1" for i in range(count)], dtype=object)
+
+
+def _key_columns(edge_schema: Dict, schema: Dict) -> List[str]:
+    """Source and target key column names for an edge type"""
+    node_ids = {n["type"]: n["id"] for n in schema["nodes"]}
+    source_col = node_ids.get(edge_schema["source_node_type"], "Source")
+    target_col = node_ids.get(edge_schema["target_node_type"], "Target")
+    if source_col == target_col:
+        source_col = f"Parent {source_col}"
+    return [source_col, target_col]
+
+
+def generate_snapshots(
+    schema: Dict,
+    rows: int,
+    snapshots: int = 1,
+    change_rate: float = 0.1,
+    seed: int = 0,
+    float_keys: bool = False,
+) -> List[Dict[str, pd.DataFrame]]:
+    """
+    Generate synthetic supply-chain snapshots matching a schema
+
+    Node tables get NODE_SHARE of the row budget and edge tables the rest.
+    Each later snapshot changes the "Value" column of change_rate of the
+    rows of every table.
+
+    With float_keys, node keys are integers and edge files reference them as
+    floats, so the CSV holds "1.0"-style keys as exported by tools that store
+    numeric columns as floats.
+
+    Args:
+        schema: Graph schema, e.g. data/sample/schema.json
+        rows: Total number of rows per snapshot across all tables
+        snapshots: Number of snapshots to generate
+        change_rate: Fraction of rows changed between consecutive snapshots
+        seed: Random seed
+        float_keys: Use integer node keys written as floats in edge files
+
+    Returns:
+        List of dictionaries mapping file type names to DataFrames
+    """
+    rng = np.random.default_rng(seed)
+    node_rows = max(1, int(rows * NODE_SHARE / max(1, len(schema["nodes"]))))
+    edge_rows = max(1, int(rows * (1 - NODE_SHARE) / max(1, len(schema["edges"]))))
+
+    tables = {}
+    keys = {}
+    for node_schema in schema["nodes"]:
+        node_type = node_schema["type"]
+        keys[node_type] = _make_keys(node_type, node_rows, numeric=float_keys)
+        tables[_file_name(node_type)] = pd.DataFrame(
+            {
+                node_schema["id"]: keys[node_type],
+                "Name": np.char.add("N", rng.integers(0, 10**6, node_rows).astype(str)),
+                "Group": rng.choice(GROUPS, node_rows),
+                "Country": rng.choice(COUNTRIES, node_rows),
+                "Value": rng.integers(0, 1000, node_rows),
+            }
+        )
+
+    for edge_schema in schema["edges"]:
+        source_col, target_col = _key_columns(edge_schema, schema)
+        source_keys = keys.get(edge_schema["source_node_type"], _make_keys("src", 1))
+        target_keys = keys.get(edge_schema["target_node_type"], _make_keys("tgt", 1))
+        if float_keys:
+            source_keys = source_keys.astype(float)
+            target_keys = target_keys.astype(float)
+        values = rng.random(edge_rows) * 100
+        # Leave some gaps so NaN handling is exercised
+        values[rng.random(edge_rows) < 0.05] = np.nan
+        tables[_file_name(edge_schema["type"])] = pd.DataFrame(
+            {
+                source_col: rng.choice(source_keys, edge_rows),
+                target_col: rng.choice(target_keys, edge_rows),
+                "Qty": rng.integers(1, 50, edge_rows),
+                "Value": values,
+            }
+        )
+
+    result = [tables]
+    for _ in range(1, snapshots):
+        changed = {}
+        for name, df in result[-1].items():
+            df = df.copy()
+            mask = rng.random(len(df)) < change_rate
+            df.loc[mask, "Value"] = rng.integers(0, 1000, int(mask.sum()))
+            changed[name] = df
+        result.append(changed)
+
+    return result
+
+
+def write_zip(tables: Dict[str, pd.DataFrame], path: str):
+    """Write tables as CSV files into a ZIP laid out like data/sample"""
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zipf:
+        for name, df in tables.items():
+            zipf.writestr(f"data/{name}.csv", df.to_csv(index=False))
+
+
+def write_xlsx(tables: Dict[str, pd.DataFrame], path: str):
+    """Write tables as sheets of an Excel workbook"""
+    with pd.ExcelWriter(path) as writer:
+        for name, df in tables.items():
+            df.to_excel(writer, sheet_name=name[:31], index=False)
+
+
+class MockGraphServer:
+    """
+    Local stand-in for the graph server's live update endpoints
+
+    Accepts /schema/live/update and /schema/live/update/bulk, keeps the type
+    of every node and edge per version (replaced by later changes to the
+    same ID, removed by deletes), and answers health, queue length and stats
+    requests so the whole load path can run without a real server.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.lock = threading.Lock()
+        self.reset()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.bytes_received = 0
+            # version -> node ID -> node type
+            self.nodes: Dict[str, Dict[str, str]] = {}
+            # version -> (sorted endpoint IDs, edge type) -> edge type
+            self.edges: Dict[str, Dict[tuple, str]] = {}
+
+    def record(self, change: Dict[str, Any], size: int):
+        with self.lock:
+            self.requests += 1
+            self.bytes_received += size
+            version = change.get("version", "")
+            delete = change.get("action") in ("delete", "bulk_delete")
+            payload = change.get("payload", [])
+            if isinstance(payload, dict):
+                payload = [payload]
+            for item in payload:
+                if "node_id" in item:
+                    items = self.nodes.setdefault(version, {})
+                    key = str(item["node_id"])
+                    type_name = item.get("node_type", "default")
+                else:
+                    items = self.edges.setdefault(version, {})
+                    type_name = item.get("edge_type", "default")
+                    endpoints = sorted([str(item.get("source_id")), str(item.get("target_id"))])
+                    key = (*endpoints, type_name)
+                if delete:
+                    items.pop(key, None)
+                else:
+                    items[key] = type_name
+
+    def stats(self, version: str) -> Dict[str, Any]:
+        with self.lock:
+            nodes = self.nodes.get(version, {})
+            edges = self.edges.get(version, {})
+            node_types = {}
+            for type_name in nodes.values():
+                node_types[type_name] = node_types.get(type_name, 0) + 1
+            edge_types = {}
+            for type_name in edges.values():
+                edge_types[type_name] = edge_types.get(type_name, 0) + 1
+            return {
+                "node_count": len(nodes),
+                "edge_count": len(edges),
+                "node_types": node_types,
+                "edge_types": edge_types,
+            }
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, obj: Any, status: int = 200):
+                body = json.dumps(obj).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.rstrip("/")
+                if path == "/api/health":
+                    self._send_json({"status": "healthy"})
+                elif path.startswith("/api/queue/length"):
+                    self._send_json({} if path.endswith("by-version") else {"length": 0})
+                elif path.startswith("/api/schema/live/") and path.endswith("/stats"):
+                    version = path[len("/api/schema/live/") : -len("/stats")]
+                    self._send_json(mock.stats(version))
+                else:
+                    self._send_json({"detail": "Not Found"}, status=404)
+
+            def do_POST(self):
+                size = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(size) or b"null")
+                path = self.path.rstrip("/")
+                if path == "/api/schema/live/update":
+                    mock.record(body, size)
+                elif path == "/api/schema/live/update/bulk":
+                    for change in body:
+                        mock.record(change, 0)
+                    with mock.lock:
+                        mock.bytes_received += size
+                else:
+                    self._send_json({"detail": "Not Found"}, status=404)
+                    return
+                self._send_json({"message": "Update queued"})
+
+        return Handler
+
+    def start(self) -> "MockGraphServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _time_call(fn: Callable, repeat: int) -> Dict[str, Any]:
+    """Run fn repeat times and return timing statistics and its last result"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "seconds": min(timings),
+        "mean_seconds": sum(timings) / len(timings),
+        "runs": timings,
+        "result": result,
+    }
+
+
+def measure_import(module: str, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Measure the import time of a module in fresh interpreters
+
+    Returns:
+        Dictionary with the fastest cumulative import time in milliseconds
+        and the heavy modules the import pulled in
+    """
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    timings = []
+    heavy = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        for line in proc.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            parts = [part.strip() for part in line.split("|")]
+            if len(parts) == 3 and parts[2] == module:
+                timings.append(int(parts[1]) / 1000)
+        heavy = [m for m in proc.stdout.strip().split(",") if m]
+    return {"module": module, "ms": min(timings), "heavy_modules": heavy}
+
+
+def check_import_budget(
+    budget: Dict[str, float] = None, repeat: int = 3
+) -> List[Dict[str, Any]]:
+    """Measure the core modules against their import-time budget"""
+    budget = budget or IMPORT_BUDGET_MS
+    results = []
+    for module, budget_ms in budget.items():
+        result = measure_import(module, repeat)
+        result["budget_ms"] = budget_ms
+        result["within_budget"] = result["ms"] <= budget_ms and not result["heavy_modules"]
+        logger.info(
+            f"import {module}: {result['ms']:.1f}ms (budget {budget_ms}ms)"
+            + (f", loads {result['heavy_modules']}" if result["heavy_modules"] else "")
+        )
+        results.append(result)
+    return results
+
+
+def run_scale(
+    schema: Dict,
+    rows: int,
+    change_rate: float,
+    snapshots: int,
+    stages: List[str],
+    work_dir: str,
+    repeat: int = 1,
+    batch_size: int = 1000,
+    seed: int = 0,
+    float_keys: bool = False,
+) -> List[Dict[str, Any]]:
+    """Generate data for one scale and change rate and time each stage"""
+    results = []
+    generated = generate_snapshots(
+        schema,
+        rows,
+        snapshots=snapshots,
+        change_rate=change_rate,
+        seed=seed,
+        float_keys=float_keys,
+    )
+    total_rows = sum(len(df) for df in generated[0].values())
+
+    def record(stage: str, timing: Dict[str, Any], items: int, **extra):
+        entry = {
+            "stage": stage,
+            "rows": rows,
+            "change_rate": change_rate,
+            "items": items,
+            "seconds": timing["seconds"],
+            "mean_seconds": timing["mean_seconds"],
+            "runs": timing["runs"],
+            "items_per_second": items / timing["seconds"] if timing["seconds"] else None,
+        }
+        entry.update(extra)
+        results.append(entry)
+        logger.info(
+            f"{stage} rows={rows} change_rate={change_rate}: {timing['seconds']:.3f}s"
+        )
+
+    zip_paths = []
+    for idx, tables in enumerate(generated):
+        path = os.path.join(work_dir, f"{1700000000 + idx}.zip")
+        write_zip(tables, path)
+        zip_paths.append(path)
+
+    plan = extract.compile_plan(schema)
+    data = None
+    for idx, path in enumerate(zip_paths):
+        if "read_zip" in stages:
+            timing = _time_call(lambda: extract.read_zip(path), repeat)
+            record("read_zip", timing, total_rows, snapshot=idx, plan=False)
+        if "read_zip" in stages or data is None:
+            timing = _time_call(lambda: extract.read_zip(path, plan), repeat)
+            data = timing["result"]
+            if "read_zip" in stages:
+                record("read_zip", timing, total_rows, snapshot=idx, plan=True)
+
+    if "read_xlsx" in stages:
+        if max(len(df) for df in generated[0].values()) > XLSX_MAX_ROWS:
+            logger.info(f"Skipping read_xlsx for rows={rows}: exceeds Excel sheet limit")
+        else:
+            xlsx_path = os.path.join(work_dir, "snapshot.xlsx")
+            write_xlsx(generated[0], xlsx_path)
+            timing = _time_call(lambda: extract.read_xlsx(xlsx_path), repeat)
+            record("read_xlsx", timing, total_rows)
+
+    timing = _time_call(lambda: transform.build_graph(data, schema), repeat)
+    graph = timing["result"]
+    graph_items = graph.number_of_nodes() + graph.number_of_edges()
+    if "build_graph" in stages:
+        record(
+            "build_graph",
+            timing,
+            total_rows,
+            nodes=graph.number_of_nodes(),
+            edges=graph.number_of_edges(),
+        )
+
+    if "export_features" in stages:
+        output_dir = os.path.join(work_dir, "features")
+        timing = _time_call(
+            lambda: transform.export_features(graph, schema, output_dir), repeat
+        )
+        record("export_features", timing, graph_items)
+
+    if "send_graph" in stages:
+        with MockGraphServer() as mock:
+            server = load.GraphServer(base_url=mock.base_url)
+            # Time the encoding and requests only; the pause between batches
+            # is reported separately as batch_delay_seconds
+            batch_delay = server.batch_delay
+            server.batch_delay = 0
+
+            def send():
+                mock.reset()
+                success, message = server.send_graph(
+                    graph, version="bench", timestamp=1700000000, batch_size=batch_size
+                )
+                if not success:
+                    raise RuntimeError(message)
+
+            timing = _time_call(send, repeat)
+            record(
+                "send_graph",
+                timing,
+                graph_items,
+                requests=mock.requests,
+                bytes_sent=mock.bytes_received,
+                batch_size=batch_size,
+                batch_delay_seconds=mock.requests * batch_delay,
+            )
+
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the ETL stages on synthetic supply-chain data"
+    )
+    parser.add_argument(
+        "--schema", default="data/sample/schema.json", help="Schema to generate data for"
+    )
+    parser.add_argument(
+        "--rows",
+        type=float,
+        nargs="+",
+        default=[1e3, 1e4, 1e5],
+        help="Total rows per snapshot, e.g. 1e3 1e5 1e7",
+    )
+    parser.add_argument(
+        "--change-rates",
+        type=float,
+        nargs="+",
+        default=[0.1],
+        help="Fraction of rows changed between snapshots",
+    )
+    parser.add_argument(
+        "--snapshots", type=int, default=2, help="Number of snapshots per scale"
+    )
+    parser.add_argument(
+        "--stages", nargs="+", choices=STAGES, default=STAGES, help="Stages to time"
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per measurement")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--float-keys",
+        action="store_true",
+        help="Use integer node keys referenced as floats (e.g. 1.0) in edge files",
+    )
+    parser.add_argument(
+        "--output", default="benchmark_results.json", help="Where to write results"
+    )
+    parser.add_argument(
+        "--check-imports",
+        action="store_true",
+        help="Only check the import-time budget of the core modules; exit 1 if exceeded",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    if args.check_imports:
+        imports = check_import_budget(repeat=max(args.repeat, 3))
+        return 0 if all(result["within_budget"] for result in imports) else 1
+
+    with open(args.schema) as f:
+        schema = json.load(f)
+
+    results = []
+    for rows in args.rows:
+        for change_rate in args.change_rates:
+            work_dir = tempfile.mkdtemp(prefix="etl-bench-")
+            try:
+                results.extend(
+                    run_scale(
+                        schema,
+                        int(rows),
+                        change_rate,
+                        args.snapshots,
+                        args.stages,
+                        work_dir,
+                        repeat=args.repeat,
+                        batch_size=args.batch_size,
+                        seed=args.seed,
+                        float_keys=args.float_keys,
+                    )
+                )
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "created": datetime.now().isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "imports": check_import_budget(repeat=max(args.repeat, 3)),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Wrote {len(results)} results to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
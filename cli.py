@@ -0,0 +1,271 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+from typing import List, Tuple
+
+import load
+import pipeline
+import sync
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def find_data_files(data: str) -> List[Tuple[int, str]]:
+    """
+    Find timestamped ZIP files in a directory or matching a glob pattern
+
+    Args:
+        data: Directory containing <timestamp>.zip files, or a glob pattern
+
+    Returns:
+        List of (timestamp, path) tuples sorted by timestamp
+    """
+    if os.path.isdir(data):
+        paths = glob.glob(os.path.join(data, "*.zip"))
+    else:
+        paths = glob.glob(data)
+
+    data_files = []
+    for path in paths:
+        try:
+            timestamp = int(os.path.splitext(os.path.basename(path))[0])
+        except ValueError:
+            logger.warning(f"Skipping {path}: expected <timestamp>.zip filename")
+            continue
+        data_files.append((timestamp, path))
+
+    return sorted(data_files)
+
+
+def run(args: argparse.Namespace) -> int:
+    """Run the ETL pipeline and return the process exit status"""
+    with open(args.schema) as f:
+        schema = json.load(f)
+
+    data_files = find_data_files(args.data)
+    if not data_files:
+        logger.error(f"No timestamped ZIP files found for {args.data}")
+        return 1
+
+    logger.info(f"Found {len(data_files)} data files to process")
+
+    server = None
+    if args.record:
+        server = load.GraphServer(transport=load.RecordingTransport(args.record))
+    elif not args.dry_run:
+        server = load.GraphServer()
+        if not server.health_check():
+            logger.error("Server is not healthy. Please check server status and try again.")
+            return 1
+
+    progress_bar = load.LogProgress() if args.progress == "log" else load.NullProgress()
+    uploaded = {}
+
+    def upload_graph(idx, timestamp, graph):
+        logger.info(
+            f"Built graph for timestamp {timestamp}: Nodes={len(graph.nodes)}, Edges={len(graph.edges)}"
+        )
+        if args.dry_run and not args.record:
+            return True
+
+        if len(args.version) > 1 and not args.sync:
+            progress_bars = {}
+            if args.progress == "log":
+                progress_bars = {
+                    version: load.LogProgress(f"Upload {timestamp} to {version}")
+                    for version in args.version
+                }
+            responses = load.upload_graph_to_versions(
+                graph,
+                timestamp,
+                args.version,
+                batch_size=args.batch_size,
+                progress_bars=progress_bars,
+                server=server,
+            )
+        else:
+            responses = {}
+            for version in args.version:
+                progress_bar.label = f"Upload {timestamp} to {version}"
+                if args.sync:
+                    responses[version] = sync.sync_graph(
+                        graph,
+                        version,
+                        timestamp,
+                        server=server,
+                        batch_size=args.batch_size,
+                        progress_bar=progress_bar,
+                        cache_dir=args.cache_dir,
+                    )
+                else:
+                    responses[version] = load.upload_graph(
+                        graph,
+                        timestamp,
+                        version=version,
+                        batch_size=args.batch_size,
+                        is_first_timestamp=idx == 0,
+                        progress_bar=progress_bar,
+                        server=server,
+                    )
+
+        for version, response in responses.items():
+            if response["success"]:
+                logger.info(
+                    f"Uploaded graph for timestamp {timestamp} to {version}: {response['message']}"
+                )
+            else:
+                logger.error(
+                    f"Failed to upload graph for timestamp {timestamp} to {version}: {response['error']}"
+                )
+
+        success = all(response["success"] for response in responses.values())
+        if success:
+            uploaded["last_graph"] = graph
+        return success
+
+    try:
+        result = pipeline.run_pipeline(
+            data_files,
+            schema,
+            upload_graph,
+            workers=args.workers,
+            queue_size=args.queue_size,
+            keep_going=args.keep_going,
+            validation=args.validate,
+        )
+    except Exception as e:
+        logger.error(f"Pipeline error: {str(e)}", exc_info=True)
+        return 1
+    finally:
+        if args.record:
+            server.transport.close()
+            logger.info(f"Recorded {server.transport.records} requests to {args.record}")
+
+    if not result["success"]:
+        logger.error(f"Failed timestamps: {result['failed']}")
+        return 1
+
+    if args.verify and args.record:
+        logger.warning("Skipping verification: uploads were recorded, not sent")
+    elif args.verify and "last_graph" in uploaded:
+        for version in args.version:
+            report = load.verify_upload(uploaded["last_graph"], version, server=server)
+            if not report["success"]:
+                logger.error(
+                    f"Verification of {version} failed: {report.get('error') or report['discrepancies']}"
+                )
+                return 1
+            logger.info(f"Verification of {version} passed")
+
+    return 0
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run the extract, transform and load pipeline without the Streamlit UI"
+    )
+    parser.add_argument("schema", help="Path to the schema JSON file")
+    parser.add_argument(
+        "data", help="Directory of <timestamp>.zip files, or a glob pattern"
+    )
+    parser.add_argument(
+        "--version",
+        nargs="+",
+        default=["v1"],
+        help="Versions to upload to; several versions are sent concurrently from one encoding",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=1000, help="Number of items per request"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to extract and transform files",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=2,
+        help="Number of built graphs buffered ahead of the upload stage",
+    )
+    parser.add_argument(
+        "--progress",
+        choices=["log", "none"],
+        default="log",
+        help="How to report upload progress",
+    )
+    parser.add_argument(
+        "--validate",
+        choices=["off", "warn", "strict"],
+        default="warn",
+        help="Check key quality and referential integrity before building; strict fails on issues",
+    )
+    parser.add_argument(
+        "--keep-going",
+        action="store_true",
+        help="Continue with later timestamps when an upload fails",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Verify the last upload against the server stats endpoints",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Upload only the difference to the server's live state of the version",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=sync.LIVE_CACHE_DIR,
+        help="Directory for cached live states used by --sync",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Extract and transform only, without contacting the server",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        help="Write upload requests to a .ndjson.gz recording instead of the server",
+    )
+    parser.add_argument(
+        "--metrics-output",
+        help="Write stage and request metrics to this file (.prom for Prometheus text, otherwise JSON)",
+    )
+    parser.add_argument(
+        "--track-memory",
+        action="store_true",
+        help="Record peak memory per stage with tracemalloc (slows the run down)",
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Logging level, DEBUG includes per-request details",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    if args.log_level:
+        logging.getLogger().setLevel(args.log_level)
+    if args.track_memory:
+        metrics.track_memory()
+
+    try:
+        return run(args)
+    finally:
+        if args.metrics_output:
+            metrics.write(args.metrics_output)
+            logger.info(f"Wrote metrics to {args.metrics_output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,99 @@
-import pandas as pd
 import json
 from datetime import datetime
 import os
 import zipfile
 import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from metrics import metrics
+from transform import normalize_type
 
 FILES_BLACKLIST = ["schema"]
 
+CSV_ENCODINGS = ["utf-8", "latin1", "cp1252"]
+
+
+@dataclass
+class TablePlan:
+    """How to read the CSV file for one node or edge type"""
+
+    type_name: str
+    key_columns: List[Optional[str]]
+    # Columns to parse, None to parse every column
+    columns: Optional[List[str]] = None
+    is_edge: bool = False
+
+    def usecols(self, header: List[str]) -> Optional[List[str]]:
+        """Columns to parse given the file header, always including the keys"""
+        if self.columns is None:
+            return None
+        keys = self.resolve_keys(header)
+        return [c for c in header if c in keys or c in self.columns]
+
+    def resolve_keys(self, header: List[str]) -> List[str]:
+        """Key column names, defaulting edge keys to the first two columns"""
+        keys = []
+        for idx, column in enumerate(self.key_columns):
+            if column is None:
+                column = header[idx] if idx < len(header) else None
+            if column is not None:
+                keys.append(column)
+        return keys
+
+
+@dataclass
+class ExtractionPlan:
+    """
+    Which archive members and columns a schema needs
+
+    Compiled from the schema by compile_plan(). Tables are keyed by type
+    name with spaces replaced by underscores, matching how build_graph
+    looks up data.
+    """
+
+    tables: Dict[str, TablePlan] = field(default_factory=dict)
+
+    def table_for(self, type_name: str) -> Optional[TablePlan]:
+        return self.tables.get(normalize_type(type_name))
+
+
+def compile_plan(schema):
+    """
+    Compile a graph schema into an extraction plan
+
+    Only files for node and edge types in the schema are read. Node and edge
+    schemas may list "columns" to parse (keys are always included), and edge
+    schemas may name their key columns with "source_key" and "target_key";
+    otherwise the first two columns of the file are used. Key columns are
+    parsed as strings; build_graph normalizes them so that keys such as "1"
+    and "1.0" compare equal across files.
+
+    Args:
+        schema: Graph schema with "nodes" and "edges" lists
+
+    Returns:
+        ExtractionPlan for read_zip
+    """
+    plan = ExtractionPlan()
+
+    for node_schema in schema["nodes"]:
+        plan.tables[normalize_type(node_schema["type"])] = TablePlan(
+            type_name=node_schema["type"],
+            key_columns=[node_schema["id"]],
+            columns=node_schema.get("columns"),
+        )
+
+    for edge_schema in schema["edges"]:
+        plan.tables[normalize_type(edge_schema["type"])] = TablePlan(
+            type_name=edge_schema["type"],
+            key_columns=[edge_schema.get("source_key"), edge_schema.get("target_key")],
+            columns=edge_schema.get("columns"),
+            is_edge=True,
+        )
+
+    return plan
+
 
 def save_xlsx_to_csv(source_path, target_path="data/"):
     data = read_xlsx(source_path)
@@ -14,6 +101,8 @@ def save_xlsx_to_csv(source_path, target_path="data/"):
     if not os.path.exists(target_path):
         os.makedirs(target_path)
 
+    import pandas as pd
+
     for key, value in data.items():
         df = pd.DataFrame(value)
         df.to_csv(f"{target_path}{key}.csv", index=False)
@@ -31,6 +120,16 @@ def read_xlsx(file_path):
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Excel file not found at path: {file_path}")
 
+    with metrics.stage("extract.read_xlsx") as timer:
+        data = _read_xlsx_sheets(file_path)
+        timer.add(items=sum(len(records) for records in data.values()))
+
+    return data
+
+
+def _read_xlsx_sheets(file_path):
+    import pandas as pd
+
     excel_file = pd.ExcelFile(file_path)
     data = {}
 
@@ -51,7 +150,7 @@ def read_xlsx(file_path):
             # Convert datetime objects to epoch time
             for record in records:
                 for key, value in record.items():
-                    if isinstance(value, (pd.Timestamp, datetime)):
+                    if isinstance(value, datetime):  # Includes pd.Timestamp
                         record[key] = int(value.timestamp())
 
             # Store the processed records
@@ -64,12 +163,14 @@ def read_xlsx(file_path):
     return data
 
 
-def read_zip(file_path):
+def read_zip(file_path, plan=None):
     """
     Read data from a zip file containing CSV files
 
     Args:
         file_path: Path to the zip file
+        plan: Optional ExtractionPlan from compile_plan(); when given, only the
+            files and columns it references are parsed
 
     Returns:
         Dictionary containing the data from each CSV file
@@ -77,6 +178,28 @@ def read_zip(file_path):
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"ZIP file not found at path: {file_path}")
 
+    with metrics.stage("extract.read_zip") as timer:
+        data = _read_zip_members(file_path, plan)
+        timer.add(items=sum(len(records) for records in data.values()))
+
+    return data
+
+
+def _read_csv_member(zip_ref, csv_file, **kwargs):
+    """Read a CSV file from a zip archive, trying different encodings"""
+    import pandas as pd
+
+    for encoding in CSV_ENCODINGS:
+        try:
+            with zip_ref.open(csv_file) as f:
+                return pd.read_csv(f, encoding=encoding, **kwargs)
+        except UnicodeDecodeError:
+            continue
+
+    raise UnicodeDecodeError(f"Failed to decode {csv_file} with any of the attempted encodings: {CSV_ENCODINGS}")
+
+
+def _read_zip_members(file_path, plan=None):
     data = {}
 
     with zipfile.ZipFile(file_path, "r") as zip_ref:
@@ -90,21 +213,23 @@ def read_zip(file_path):
             if type_name.lower() in FILES_BLACKLIST:
                 continue
 
-            # Read CSV file directly from zip, try different encodings
-            encodings = ['utf-8', 'latin1', 'cp1252']
-            df = None
-            
-            for encoding in encodings:
-                try:
-                    with zip_ref.open(csv_file) as f:
-                        df = pd.read_csv(f, encoding=encoding)
-                    break
-                except UnicodeDecodeError:
+            if plan is None:
+                df = _read_csv_member(zip_ref, csv_file)
+            else:
+                table = plan.table_for(type_name)
+                if table is None:
+                    # Not referenced by the schema
                     continue
-            
-            if df is None:
-                raise UnicodeDecodeError(f"Failed to decode {csv_file} with any of the attempted encodings: {encodings}")
-                
+
+                header = list(_read_csv_member(zip_ref, csv_file, nrows=0).columns)
+                keys = table.resolve_keys(header)
+                df = _read_csv_member(
+                    zip_ref,
+                    csv_file,
+                    usecols=table.usecols(header),
+                    dtype={key: str for key in keys},
+                )
+
             data[type_name] = df.to_dict(orient="records")
 
     return data
@@ -130,6 +255,8 @@ def save_timestamped_data(data, timestamp=None):
     if not os.path.exists(temp_dir):
         os.makedirs(temp_dir)
 
+    import pandas as pd
+
     try:
         # Save each data type to a CSV file
         for type_name, records in data.items():
@@ -1,15 +1,22 @@
-import requests
 import json
-import networkx as nx
-from typing import Dict, Any, List, Tuple
+import math
+import sys
+from typing import TYPE_CHECKING, Dict, Any, Iterable, Iterator, List, Tuple
 import logging
 import time
 import copy
-import numpy as np
-import pandas as pd
-import streamlit as st
+import gzip
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 import os
 
+from metrics import metrics
+
+if TYPE_CHECKING:
+    # networkx is imported on first use to keep imports fast
+    import networkx as nx
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,50 +26,300 @@ class NaNEncoder(json.JSONEncoder):
     """Custom JSON encoder to handle NaN, Infinity, and -Infinity values"""
 
     def default(self, obj):
-        if isinstance(obj, float) and (np.isnan(obj) or pd.isna(obj)):
+        if isinstance(obj, float) and math.isnan(obj):
             return None
-        if isinstance(obj, float) and np.isinf(obj):
+        if isinstance(obj, float) and math.isinf(obj):
             return "Infinity" if obj > 0 else "-Infinity"
-        if isinstance(obj, (np.integer, np.floating)):
-            return int(obj) if isinstance(obj, np.integer) else float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        if pd.isna(obj):
+        # numpy and pandas values can only exist once their module is imported
+        np = sys.modules.get("numpy")
+        if np is not None:
+            if isinstance(obj, (np.integer, np.floating)):
+                return int(obj) if isinstance(obj, np.integer) else float(obj)
+            if isinstance(obj, np.ndarray):
+                return obj.tolist()
+        pd = sys.modules.get("pandas")
+        if pd is not None and pd.isna(obj):
             return None
         return super().default(obj)
 
 
+def _clean_properties(attrs: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy attributes into a properties dict, handling NaN and infinite values"""
+    properties = {}
+    for k, v in attrs.items():
+        if k not in ["type", "label"]:  # Skip already processed attributes
+            if isinstance(v, float) and math.isnan(v):
+                properties[k] = None
+            elif isinstance(v, float) and math.isinf(v):
+                properties[k] = "Infinity" if v > 0 else "-Infinity"
+            else:
+                properties[k] = v
+    return properties
+
+
+def _is_request_error(error: Exception) -> bool:
+    """Whether an exception was raised by requests, without importing it"""
+    requests = sys.modules.get("requests")
+    return requests is not None and isinstance(
+        error, requests.exceptions.RequestException
+    )
+
+
+def _find_count(value: Any) -> int:
+    """Extract an integer count from a server response value"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, dict):
+        for key in ["count", "length", "total", "queue_length"]:
+            if key in value:
+                return _find_count(value[key])
+    return 0
+
+
+def node_to_payload(node: Any, attrs: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a graph node into the server's node format"""
+    return {
+        "node_id": str(node),
+        "node_type": attrs.get("type", "default"),
+        "label": attrs.get("label", str(node)),
+        "properties": _clean_properties(attrs),
+    }
+
+
+def edge_to_payload(source: Any, target: Any, attrs: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a graph edge into the server's edge format"""
+    return {
+        "source_id": str(source),
+        "target_id": str(target),
+        "edge_type": attrs.get("type", "default"),
+        "label": attrs.get("label", f"{source}->{target}"),
+        "properties": _clean_properties(attrs),
+    }
+
+
+def graph_payloads(graph: "nx.Graph") -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Convert a graph into lists of node and edge payloads"""
+    nodes_list = [node_to_payload(node, attrs) for node, attrs in graph.nodes(data=True)]
+    edges_list = [
+        edge_to_payload(source, target, attrs)
+        for source, target, attrs in graph.edges(data=True)
+    ]
+    return nodes_list, edges_list
+
+
+def encode_change(
+    action: str, items: List[Dict[str, Any]], timestamp: int, change_type: str = "schema"
+) -> bytes:
+    """
+    Encode a Change request body without its version field
+
+    The body can be sent to any number of versions with with_version(), so
+    NaN handling and JSON encoding run once per batch.
+    """
+    change = {
+        "action": action,
+        "type": change_type,
+        "timestamp": timestamp,
+        "payload": items,
+    }
+    return json.dumps(change, cls=NaNEncoder, allow_nan=False).encode("utf-8")
+
+
+def with_version(body: bytes, version: str) -> bytes:
+    """Add the version field to a body from encode_change()"""
+    return b'{"version": ' + json.dumps(version).encode("utf-8") + b", " + body[1:]
+
+
+class LogProgress:
+    """
+    Progress reporter that writes to the log instead of a Streamlit widget
+
+    Implements the same progress()/empty() interface as st.progress so it can
+    be passed anywhere a progress bar is expected.
+    """
+
+    def __init__(self, label: str = "Upload", step: float = 0.1):
+        self.label = label
+        self.step = step
+        self._last_reported = -1.0
+
+    def progress(self, value: float):
+        if value >= 1.0 or value - self._last_reported >= self.step:
+            logger.info(f"{self.label}: {value * 100:.0f}%")
+            self._last_reported = value
+
+    def empty(self):
+        self._last_reported = -1.0
+
+
+class NullProgress:
+    """Progress reporter that discards all updates"""
+
+    def progress(self, value: float):
+        pass
+
+    def empty(self):
+        pass
+
+
+class HttpTransport:
+    """Sends requests to the graph server over HTTP"""
+
+    def __init__(self, base_url: str):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        # Keep connections alive across requests and timestamps
+        self.session = requests.Session()
+
+    def request(self, method: str, endpoint: str, body: bytes = None) -> Any:
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        if method.lower() == "get":
+            response = self.session.get(url)
+        elif method.lower() == "post":
+            response = self.session.post(
+                url, data=body, headers={"Content-Type": "application/json"}
+            )
+        else:
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        logger.debug(f"Response status: {response.status_code}")
+        response.raise_for_status()
+        return response.json()
+
+
+class RecordingTransport:
+    """
+    Writes every POST body to a gzip-compressed NDJSON file instead of the network
+
+    Each line is {"endpoint": ..., "body": <Change>}, written in the order the
+    requests were made. GET requests are answered locally: the health check
+    reports healthy and everything else returns an empty response. Use
+    replay.replay_recording() to send a recording to a server.
+    """
+
+    # Line prefix up to the endpoint; the raw request body follows after BODY_KEY
+    BODY_KEY = b', "body": '
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+        self.records = 0
+
+    def request(self, method: str, endpoint: str, body: bytes = None) -> Any:
+        if method.lower() == "get":
+            return {"status": "healthy"} if endpoint.strip("/") == "health" else {}
+        if method.lower() != "post":
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        line = (
+            b'{"endpoint": '
+            + json.dumps(endpoint.strip("/")).encode("utf-8")
+            + self.BODY_KEY
+            + body
+            + b"}\n"
+        )
+        with self._lock:
+            if self._file is None:
+                self._file = gzip.open(self.path, "wb")
+            self._file.write(line)
+            self.records += 1
+        return {"message": "Recorded"}
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 class GraphServer:
-    def __init__(self, base_url: str = "http://localhost:8000/api"):
-        default_host = os.getenv("API_HOST", "localhost")
-        self.base_url = f"http://{default_host}:8000/api"
+    def __init__(self, base_url: str = None, transport=None):
+        if base_url is None:
+            default_host = os.getenv("API_HOST", "localhost")
+            base_url = f"http://{default_host}:8000/api"
+        self.base_url = base_url.rstrip("/")
+        self.transport = transport or HttpTransport(self.base_url)
+        # Pause between batches to avoid flooding the server queue; recordings
+        # don't need it since the replayer controls the rate
+        self.batch_delay = 0.1 if isinstance(self.transport, HttpTransport) else 0.0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._last_health_check = (0.0, False)
+        # version -> HttpTransport used by send_changes_to_versions()
+        self._version_transports: Dict[str, HttpTransport] = {}
+
+    def _transport_for(self, version: str):
+        """
+        Transport for sending to one version from its own thread
+
+        requests.Session is not thread-safe, so each version gets its own HTTP
+        transport, created on first use and reused so connections stay open
+        across timestamps. Other transports are shared.
+        """
+        if not isinstance(self.transport, HttpTransport):
+            return self.transport
+        with self._lock:
+            transport = self._version_transports.get(version)
+            if transport is None:
+                transport = HttpTransport(self.base_url)
+                self._version_transports[version] = transport
+        return transport
 
     def _make_request(
-        self, method: str, endpoint: str, data: Dict[str, Any] = None
+        self,
+        method: str,
+        endpoint: str,
+        data: Dict[str, Any] = None,
+        body: bytes = None,
+        transport=None,
     ) -> Dict[str, Any]:
-        """Make HTTP request to server"""
+        """
+        Make request to server through the configured transport
+
+        POST requests send data encoded as JSON, or an already encoded body.
+        A separate transport can be given for requests made from other threads.
+        """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        transport = transport or self.transport
+        debug = logger.isEnabledFor(logging.DEBUG)
+        bytes_sent = 0
+        start = time.perf_counter()
         try:
-            logger.info(f"Making {method} request to {url}")
-            if data:
-                logger.info(
-                    f"Request payload: action={data.get('action')}, type={data.get('type')}, timestamp={data.get('timestamp')}"
-                )
-                logger.info(f"Payload size: {len(data.get('payload', []))} items")
-
-            if method.lower() == "get":
-                response = requests.get(url)
-            elif method.lower() == "post":
-                # Convert data to JSON with NaN handling
-                json_data = json.dumps(data, cls=NaNEncoder)
-                response = requests.post(url, json=json.loads(json_data))
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-
-            logger.info(f"Response status: {response.status_code}")
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            if debug:
+                logger.debug(f"Making {method} request to {url}")
+                if data:
+                    logger.debug(
+                        f"Request payload: action={data.get('action')}, type={data.get('type')}, "
+                        f"timestamp={data.get('timestamp')}, size={len(data.get('payload', []))} items"
+                    )
+
+            if method.lower() == "post":
+                if body is None:
+                    # Convert data to JSON with NaN handling
+                    body = json.dumps(data, cls=NaNEncoder, allow_nan=False).encode("utf-8")
+                bytes_sent = len(body)
+
+            response = transport.request(method, endpoint, body)
+            metrics.observe_request(endpoint, time.perf_counter() - start, bytes_sent)
+            with self._lock:
+                self.bytes_sent += bytes_sent
+            return response
+        except Exception as e:
+            if not _is_request_error(e):
+                raise
+            metrics.observe_request(
+                endpoint, time.perf_counter() - start, bytes_sent, failed=True
+            )
             logger.error(f"Error making {method} request to {url}: {str(e)}")
             logger.error(
                 f"Response content: {getattr(e.response, 'content', 'No content')}"
@@ -71,7 +328,7 @@ class GraphServer:
 
     def send_graph(
         self,
-        graph: nx.Graph,
+        graph: "nx.Graph",
         version: str,
         timestamp: int = 0,
         batch_size: int = 1000,
@@ -79,58 +336,31 @@ class GraphServer:
         is_first_timestamp: bool = True,
     ) -> Tuple[bool, str]:
         """Send graph data to server in batches with progress tracking"""
+        with metrics.stage("load.send_graph") as timer:
+            bytes_before = self.bytes_sent
+            result = self._send_graph(
+                graph, version, timestamp, batch_size, progress_bar, is_first_timestamp
+            )
+            timer.add(
+                items=graph.number_of_nodes() + graph.number_of_edges(),
+                bytes=self.bytes_sent - bytes_before,
+            )
+        return result
+
+    def _send_graph(
+        self,
+        graph: "nx.Graph",
+        version: str,
+        timestamp: int,
+        batch_size: int,
+        progress_bar,
+        is_first_timestamp: bool,
+    ) -> Tuple[bool, str]:
         try:
             # Convert graph to node and edge lists
-            nodes_list = []
-            edges_list = []
-
-            # Process nodes
-            for node, attrs in graph.nodes(data=True):
-                node_data = {
-                    "node_id": str(node),
-                    "node_type": attrs.get("type", "default"),
-                    "label": attrs.get("label", str(node)),
-                    "properties": {},
-                }
-                # Handle NaN values in attributes
-                for k, v in attrs.items():
-                    if k not in ["type", "label"]:  # Skip already processed attributes
-                        if isinstance(v, float) and (np.isnan(v) or pd.isna(v)):
-                            node_data["properties"][k] = None
-                        elif isinstance(v, float) and np.isinf(v):
-                            node_data["properties"][k] = (
-                                "Infinity" if v > 0 else "-Infinity"
-                            )
-                        else:
-                            node_data["properties"][k] = v
-
-                nodes_list.append(node_data)
-
-            # Process edges
-            for source, target, attrs in graph.edges(data=True):
-                edge_data = {
-                    "source_id": str(source),
-                    "target_id": str(target),
-                    "edge_type": attrs.get("type", "default"),
-                    "label": attrs.get("label", f"{source}->{target}"),
-                    "properties": {},
-                }
-                # Handle NaN values in attributes
-                for k, v in attrs.items():
-                    if k not in ["type", "label"]:  # Skip already processed attributes
-                        if isinstance(v, float) and (np.isnan(v) or pd.isna(v)):
-                            edge_data["properties"][k] = None
-                        elif isinstance(v, float) and np.isinf(v):
-                            edge_data["properties"][k] = (
-                                "Infinity" if v > 0 else "-Infinity"
-                            )
-                        else:
-                            edge_data["properties"][k] = v
-
-                edges_list.append(edge_data)
+            nodes_list, edges_list = graph_payloads(graph)
 
             total_items = len(nodes_list) + len(edges_list)
-            current_progress = 0
 
             logger.info(f"Sending {len(nodes_list)} nodes and {len(edges_list)} edges")
 
@@ -139,41 +369,14 @@ class GraphServer:
             action = "bulk_create"
             logger.info(f"Using {action} for timestamp {timestamp}")
 
-            # Send nodes in batches
-            for i in range(0, len(nodes_list), batch_size):
-                batch = nodes_list[i : i + batch_size]
-                payload = {
-                    "version": version,
-                    "action": action,
-                    "type": "schema",
-                    "timestamp": timestamp,
-                    "payload": batch,
-                }
-                self._make_request("post", "schema/live/update", payload)
-                time.sleep(0.1)  # Small delay between batches
-
-                current_progress += len(batch)
-                if progress_bar is not None:
-                    progress_bar.progress(current_progress / total_items)
-                logger.info(f"Uploaded {current_progress}/{total_items} items")
-
-            # Send edges in batches
-            for i in range(0, len(edges_list), batch_size):
-                batch = edges_list[i : i + batch_size]
-                payload = {
-                    "version": version,
-                    "action": action,
-                    "type": "schema",
-                    "timestamp": timestamp,
-                    "payload": batch,
-                }
-                self._make_request("post", "schema/live/update", payload)
-                time.sleep(0.1)  # Small delay between batches
-
-                current_progress += len(batch)
-                if progress_bar is not None:
-                    progress_bar.progress(current_progress / total_items)
-                logger.info(f"Uploaded {current_progress}/{total_items} items")
+            # Send nodes, then edges, in batches
+            self.send_changes(
+                [(action, nodes_list), (action, edges_list)],
+                version=version,
+                timestamp=timestamp,
+                batch_size=batch_size,
+                progress_bar=progress_bar,
+            )
 
             return (
                 True,
@@ -183,12 +386,117 @@ class GraphServer:
             logger.error(f"Error sending graph: {str(e)}")
             return False, f"Error sending graph: {str(e)}"
 
+    def send_changes(
+        self,
+        changes: List[Tuple[str, List[Dict[str, Any]]]],
+        version: str,
+        timestamp: int,
+        batch_size: int = 1000,
+        progress_bar=None,
+    ):
+        """
+        Send lists of node or edge payloads to the live schema in batches
+
+        Args:
+            changes: (action, items) pairs sent in order, e.g.
+                [("bulk_create", nodes), ("bulk_create", edges)]
+            version: Version to update
+            timestamp: Timestamp of the changes
+            batch_size: Number of items per request
+            progress_bar: Object with a progress() method, updated after each batch
+
+        Raises:
+            requests.exceptions.RequestException: If a request fails
+        """
+        total_items = sum(len(items) for _, items in changes)
+        current_progress = 0
+
+        for action, items in changes:
+            for i in range(0, len(items), batch_size):
+                batch = items[i : i + batch_size]
+                body = with_version(encode_change(action, batch, timestamp), version)
+                self._make_request("post", "schema/live/update", body=body)
+                if self.batch_delay:
+                    time.sleep(self.batch_delay)  # Small delay between batches
+
+                current_progress += len(batch)
+                if progress_bar is not None:
+                    progress_bar.progress(current_progress / total_items)
+                logger.debug(f"Uploaded {current_progress}/{total_items} items")
+
+    def send_changes_to_versions(
+        self,
+        changes: List[Tuple[str, List[Dict[str, Any]]]],
+        versions: List[str],
+        timestamp: int,
+        batch_size: int = 1000,
+        progress_bars: Dict[str, Any] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Send the same changes to several versions concurrently
+
+        Each batch is encoded once; only the version field differs between
+        targets. Every version is sent from its own thread and connection, in
+        the same batch order as send_changes(); connections are kept open for
+        later calls. A failing version stops without affecting the others.
+
+        Args:
+            changes: (action, items) pairs sent in order, see send_changes()
+            versions: Versions to update
+            timestamp: Timestamp of the changes
+            batch_size: Number of items per request
+            progress_bars: Optional mapping of version to an object with a
+                progress() method; updated from the calling thread
+
+        Returns:
+            Dictionary mapping each version to {"success", "sent", "error"}
+        """
+        batches = []
+        for action, items in changes:
+            for i in range(0, len(items), batch_size):
+                batch = items[i : i + batch_size]
+                batches.append((len(batch), encode_change(action, batch, timestamp)))
+
+        total_items = sum(count for count, _ in batches)
+        progress_bars = progress_bars or {}
+        sent = {version: 0 for version in versions}
+
+        def send_to(version: str) -> Dict[str, Any]:
+            transport = self._transport_for(version)
+            try:
+                for count, body in batches:
+                    self._make_request(
+                        "post",
+                        "schema/live/update",
+                        body=with_version(body, version),
+                        transport=transport,
+                    )
+                    if self.batch_delay:
+                        time.sleep(self.batch_delay)
+                    sent[version] += count
+                return {"success": True, "sent": sent[version], "error": None}
+            except Exception as e:
+                logger.error(f"Error sending to version {version}: {str(e)}")
+                return {"success": False, "sent": sent[version], "error": str(e)}
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(len(versions), 1)) as executor:
+            futures = {executor.submit(send_to, version): version for version in versions}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.2)
+                for future in done:
+                    results[futures[future]] = future.result()
+                for version, progress_bar in progress_bars.items():
+                    if total_items:
+                        progress_bar.progress(sent.get(version, 0) / total_items)
+
+        return {version: results[version] for version in versions}
+
     def get_versions(self) -> List[str]:
         """Get list of available versions from server"""
         try:
-            response = requests.get(f"{self.base_url}/versions")
-            response.raise_for_status()
-            versions = response.json()
+            versions = self._make_request("get", "versions")
             if isinstance(versions, list):
                 return sorted(versions)
             return []
@@ -200,9 +508,72 @@ class GraphServer:
         """Check if server is healthy"""
         try:
             response = self._make_request("get", "health")
-            return response.get("status") == "healthy"
+            healthy = response.get("status") == "healthy"
         except:
-            return False
+            healthy = False
+        self._last_health_check = (time.time(), healthy)
+        return healthy
+
+    def is_healthy(self, max_age: float = 60.0) -> bool:
+        """Health status, reusing the last check if it is recent enough"""
+        checked_at, healthy = self._last_health_check
+        if healthy and time.time() - checked_at <= max_age:
+            return True
+        return self.health_check()
+
+    def get_live_schema(self, version: str) -> Dict[str, Any]:
+        """Get the full live schema graph of a version in compressed form"""
+        return self._make_request("get", f"schema/live/{version}/compressed")
+
+    def get_processing_timestamp(self, version: str) -> int:
+        """Get the timestamp the server is currently processing for a version"""
+        response = self._make_request("get", f"processing-timestamps/{version}")
+        if isinstance(response, dict):
+            for key in ["timestamp", "processing_timestamp", version]:
+                if key in response:
+                    response = response[key]
+                    break
+        try:
+            return int(response)
+        except (TypeError, ValueError):
+            return 0
+
+    def get_live_schema_stats(self, version: str) -> Dict[str, Any]:
+        """Get node and edge statistics for the live schema of a version"""
+        return self._make_request("get", f"schema/live/{version}/stats")
+
+    def get_queue_length(self, version: str = None) -> int:
+        """Get number of queued operations, optionally for a single version"""
+        if version is None:
+            response = self._make_request("get", "queue/length")
+            return _find_count(response)
+
+        response = self._make_request("get", "queue/length/by-version")
+        if not isinstance(response, dict):
+            return 0
+        if version not in response and len(response) == 1:
+            # Unwrap responses of the form {"queue_lengths": {...}}
+            inner = next(iter(response.values()))
+            if isinstance(inner, dict):
+                response = inner
+        return _find_count(response.get(version, 0))
+
+    def wait_for_queue(
+        self, version: str, poll_interval: float = 1.0, timeout: float = 300.0
+    ) -> bool:
+        """Poll the queue until no operations remain for a version"""
+        deadline = time.time() + timeout
+        while True:
+            remaining = self.get_queue_length(version)
+            if remaining == 0:
+                return True
+            if time.time() >= deadline:
+                logger.warning(
+                    f"Queue for version {version} still has {remaining} operations after {timeout}s"
+                )
+                return False
+            logger.info(f"Waiting for {remaining} queued operations on {version}")
+            time.sleep(poll_interval)
 
 
 def upload_to_server(
@@ -210,48 +581,102 @@ def upload_to_server(
     version: str = "v1",
     batch_size: int = 1000,
     is_first_timestamp: bool = True,
+    progress_bar=None,
+    server: "GraphServer" = None,
 ) -> Dict[str, Any]:
     """
     Upload graph data to server using the GraphServer class
 
+    Prefer upload_graph() when the graph is already built in this process;
+    this function takes node-link data and rebuilds the graph first.
+
     Args:
         data: Dictionary containing timestamp and graph data
         version: Version string for the upload
         batch_size: Number of items to send in each batch
         is_first_timestamp: Whether this is the first timestamp being uploaded
+        progress_bar: Object with progress() and empty() methods, such as
+            LogProgress; defaults to a Streamlit progress bar
+        server: GraphServer to reuse, a new one is created if not given
+
+    Returns:
+        Dictionary with upload status
+    """
+    import networkx as nx
+
+    try:
+        graph = nx.node_link_graph(data["graph"])
+        timestamp = int(data["timestamp"])
+    except Exception as e:
+        error = f"Upload error: {str(e)}"
+        logger.error(error, exc_info=True)
+        return {"success": False, "error": f"Unexpected error: {str(e)}"}
+
+    return upload_graph(
+        graph,
+        timestamp,
+        version=version,
+        batch_size=batch_size,
+        is_first_timestamp=is_first_timestamp,
+        progress_bar=progress_bar,
+        server=server,
+    )
+
+
+def upload_graph(
+    graph: "nx.Graph",
+    timestamp: int,
+    version: str = "v1",
+    batch_size: int = 1000,
+    is_first_timestamp: bool = True,
+    progress_bar=None,
+    server: "GraphServer" = None,
+) -> Dict[str, Any]:
+    """
+    Upload a built graph to the server
+
+    Pass the same server for every timestamp of a run to reuse its
+    connection and health check.
+
+    Args:
+        graph: Graph to upload
+        timestamp: Timestamp of the snapshot
+        version: Version string for the upload
+        batch_size: Number of items to send in each batch
+        is_first_timestamp: Whether this is the first timestamp being uploaded
+        progress_bar: Object with progress() and empty() methods, such as
+            LogProgress; defaults to a Streamlit progress bar
+        server: GraphServer to reuse, a new one is created if not given
 
     Returns:
         Dictionary with upload status
     """
     try:
         logger.info(
-            f"Starting upload for timestamp {data['timestamp']} (is_first_timestamp={is_first_timestamp})"
+            f"Starting upload for timestamp {timestamp} (is_first_timestamp={is_first_timestamp})"
         )
 
-        # Initialize GraphServer
-        server = GraphServer()
+        server = server or GraphServer()
 
         # Check server health
-        if not server.health_check():
+        if not server.is_healthy():
             logger.error("Server health check failed")
             return {"success": False, "error": "Server is not healthy"}
 
-        # Get graph and timestamp from data
-        graph = nx.node_link_graph(data["graph"])
-        timestamp = int(data["timestamp"])
-
         logger.info(f"Graph info: Nodes={len(graph.nodes)}, Edges={len(graph.edges)}")
 
         # Create progress bar
-        progress_bar = st.progress(0.0)
-        status_text = st.empty()
+        if progress_bar is None:
+            import streamlit as st
+
+            progress_bar = st.progress(0.0)
 
         try:
             # Send graph to server
             success, message = server.send_graph(
                 graph=graph,
                 version=version,
-                timestamp=timestamp,
+                timestamp=int(timestamp),
                 batch_size=batch_size,
                 progress_bar=progress_bar,
                 is_first_timestamp=is_first_timestamp,
@@ -266,9 +691,312 @@ def upload_to_server(
         finally:
             # Clean up progress bar
             progress_bar.empty()
-            status_text.empty()
 
     except Exception as e:
         error = f"Upload error: {str(e)}"
         logger.error(error, exc_info=True)
         return {"success": False, "error": f"Unexpected error: {str(e)}"}
+
+
+def upload_graphs(
+    graphs: Iterable[Tuple[int, "nx.Graph"]],
+    version: str = "v1",
+    batch_size: int = 1000,
+    progress_bar=None,
+    server: "GraphServer" = None,
+    keep_going: bool = True,
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Upload a stream of graphs in order over a single server connection
+
+    Args:
+        graphs: Iterable of (timestamp, graph) tuples in upload order
+        version: Version string for the upload
+        batch_size: Number of items to send in each batch
+        progress_bar: Progress reporter shared by all uploads
+        server: GraphServer to reuse, a new one is created if not given
+        keep_going: Continue with later graphs after a failed upload
+
+    Yields:
+        (timestamp, result) tuples as each upload finishes
+    """
+    server = server or GraphServer()
+    for idx, (timestamp, graph) in enumerate(graphs):
+        result = upload_graph(
+            graph,
+            timestamp,
+            version=version,
+            batch_size=batch_size,
+            is_first_timestamp=idx == 0,
+            progress_bar=progress_bar,
+            server=server,
+        )
+        yield timestamp, result
+        if not result["success"] and not keep_going:
+            break
+
+
+def upload_graph_to_versions(
+    graph: "nx.Graph",
+    timestamp: int,
+    versions: List[str],
+    batch_size: int = 1000,
+    progress_bars: Dict[str, Any] = None,
+    server: "GraphServer" = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Upload a built graph to several versions, e.g. staging, prod and a scenario copy
+
+    The graph is converted and encoded once and the request bodies are sent
+    to all versions concurrently, see GraphServer.send_changes_to_versions().
+
+    Args:
+        graph: Graph to upload
+        timestamp: Timestamp of the snapshot
+        versions: Versions to upload to
+        batch_size: Number of items to send in each batch
+        progress_bars: Optional mapping of version to an object with
+            progress() and empty() methods, such as LogProgress
+        server: GraphServer to reuse, a new one is created if not given
+
+    Returns:
+        Dictionary mapping each version to its upload status
+    """
+    progress_bars = progress_bars or {}
+    try:
+        server = server or GraphServer()
+        if not server.is_healthy():
+            logger.error("Server health check failed")
+            return {v: {"success": False, "error": "Server is not healthy"} for v in versions}
+
+        with metrics.stage("load.send_graph_to_versions") as timer:
+            bytes_before = server.bytes_sent
+            nodes_list, edges_list = graph_payloads(graph)
+            logger.info(
+                f"Sending {len(nodes_list)} nodes and {len(edges_list)} edges to versions {versions}"
+            )
+            sent = server.send_changes_to_versions(
+                [("bulk_create", nodes_list), ("bulk_create", edges_list)],
+                versions,
+                timestamp=int(timestamp),
+                batch_size=batch_size,
+                progress_bars=progress_bars,
+            )
+            timer.add(
+                items=(len(nodes_list) + len(edges_list)) * len(versions),
+                bytes=server.bytes_sent - bytes_before,
+            )
+    except Exception as e:
+        error = f"Upload error: {str(e)}"
+        logger.error(error, exc_info=True)
+        return {v: {"success": False, "error": f"Unexpected error: {str(e)}"} for v in versions}
+    finally:
+        for progress_bar in progress_bars.values():
+            progress_bar.empty()
+
+    results = {}
+    total_items = len(nodes_list) + len(edges_list)
+    for version, result in sent.items():
+        if result["success"]:
+            message = (
+                f"Successfully sent {total_items} items ({len(nodes_list)} nodes, "
+                f"{len(edges_list)} edges) to {version}"
+            )
+            results[version] = {"success": True, "message": message}
+        else:
+            error = (
+                f"Error sending graph to {version} after {result['sent']}/{total_items} items: "
+                f"{result['error']}"
+            )
+            results[version] = {"success": False, "error": error}
+        logger.info(f"Upload to {version} completed: success={result['success']}")
+    return results
+
+
+def get_graph_stats(graph: "nx.Graph") -> Dict[str, Any]:
+    """Count nodes and edges of a graph by type"""
+    node_types = {}
+    for _, attrs in graph.nodes(data=True):
+        node_type = attrs.get("type", "default")
+        node_types[node_type] = node_types.get(node_type, 0) + 1
+
+    edge_types = {}
+    for _, _, attrs in graph.edges(data=True):
+        edge_type = attrs.get("type", "default")
+        edge_types[edge_type] = edge_types.get(edge_type, 0) + 1
+
+    return {
+        "node_count": graph.number_of_nodes(),
+        "edge_count": graph.number_of_edges(),
+        "node_types": node_types,
+        "edge_types": edge_types,
+    }
+
+
+def sample_checksums(graph: "nx.Graph", sample_size: int = 100) -> Dict[str, str]:
+    """
+    Compute checksums for a deterministic sample of node and edge payloads
+
+    Args:
+        graph: Graph to sample
+        sample_size: Number of nodes and of edges to include
+
+    Returns:
+        Dictionary mapping node IDs and "source->target" edge keys to SHA-1 digests
+    """
+    checksums = {}
+
+    nodes = sorted(graph.nodes(data=True), key=lambda n: str(n[0]))[:sample_size]
+    for node, attrs in nodes:
+        checksums[str(node)] = payload_checksum(node_to_payload(node, attrs))
+
+    edges = sorted(graph.edges(data=True), key=lambda e: (str(e[0]), str(e[1])))
+    for source, target, attrs in edges[:sample_size]:
+        checksums[f"{source}->{target}"] = payload_checksum(
+            edge_to_payload(source, target, attrs)
+        )
+
+    return checksums
+
+
+class _ChecksumEncoder(NaNEncoder):
+    """NaNEncoder that falls back to str() for values it can't encode"""
+
+    def default(self, obj):
+        try:
+            return super().default(obj)
+        except TypeError:
+            return str(obj)
+
+
+def payload_checksum(item: Dict[str, Any]) -> str:
+    """SHA-1 digest of a node or edge payload in canonical JSON form"""
+    encoded = json.dumps(item, cls=_ChecksumEncoder, sort_keys=True)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def _compare_counts(
+    kind: str, local: Dict[str, int], remote: Dict[str, Any]
+) -> List[str]:
+    """List differences between local and server per-type counts"""
+    discrepancies = []
+    for type_name in sorted(set(local) | set(remote)):
+        local_count = local.get(type_name, 0)
+        remote_count = _find_count(remote.get(type_name, 0))
+        if local_count != remote_count:
+            discrepancies.append(
+                f"{kind} type '{type_name}': local={local_count}, server={remote_count}"
+            )
+    return discrepancies
+
+
+def verify_upload(
+    graph: "nx.Graph",
+    version: str,
+    server: "GraphServer" = None,
+    poll_interval: float = 1.0,
+    timeout: float = 300.0,
+    sample_size: int = 0,
+) -> Dict[str, Any]:
+    """
+    Verify that the server holds what was uploaded, using only the stats endpoints
+
+    Waits for the version's queue to drain, then compares total and per-type
+    node and edge counts from /schema/live/{version}/stats against the local
+    graph. When sample_size is set and the server reports checksums, a sample
+    of node and edge checksums is compared as well.
+
+    Args:
+        graph: Graph that was uploaded last
+        version: Version the graph was uploaded to
+        server: GraphServer to use, a new one is created if not given
+        poll_interval: Seconds between queue length polls
+        timeout: Maximum seconds to wait for the queue to drain
+        sample_size: Number of nodes and edges to checksum, 0 to skip
+
+    Returns:
+        Dictionary with verification status and any discrepancies found;
+        fails with an error if the stats contain no comparable fields
+    """
+    server = server or GraphServer()
+    discrepancies = []
+
+    try:
+        queue_drained = server.wait_for_queue(
+            version, poll_interval=poll_interval, timeout=timeout
+        )
+        if not queue_drained:
+            discrepancies.append("Server queue did not drain before timeout")
+
+        server_stats = server.get_live_schema_stats(version)
+    except Exception as e:
+        error = f"Verification error: {str(e)}"
+        logger.error(error)
+        return {"success": False, "error": error, "discrepancies": discrepancies}
+
+    local_stats = get_graph_stats(graph)
+    if not isinstance(server_stats, dict):
+        server_stats = {}
+    fields_compared = 0
+
+    for key in ["node_count", "edge_count"]:
+        if key in server_stats:
+            fields_compared += 1
+            remote_count = _find_count(server_stats[key])
+            if remote_count != local_stats[key]:
+                discrepancies.append(
+                    f"{key}: local={local_stats[key]}, server={remote_count}"
+                )
+
+    if isinstance(server_stats.get("node_types"), dict):
+        fields_compared += 1
+        discrepancies.extend(
+            _compare_counts("Node", local_stats["node_types"], server_stats["node_types"])
+        )
+    if isinstance(server_stats.get("edge_types"), dict):
+        fields_compared += 1
+        discrepancies.extend(
+            _compare_counts("Edge", local_stats["edge_types"], server_stats["edge_types"])
+        )
+
+    checksums_checked = 0
+    if sample_size > 0:
+        remote_checksums = server_stats.get("checksums")
+        if isinstance(remote_checksums, dict):
+            for key, checksum in sample_checksums(graph, sample_size).items():
+                if key not in remote_checksums:
+                    continue
+                checksums_checked += 1
+                if remote_checksums[key] != checksum:
+                    discrepancies.append(f"Checksum mismatch for {key}")
+        else:
+            logger.info("Server stats do not include checksums, skipping sample check")
+
+    if not fields_compared:
+        # Nothing was compared, so the upload can't be considered verified
+        error = (
+            "Verification error: server stats contain none of node_count, edge_count, "
+            f"node_types or edge_types (got keys {sorted(server_stats)})"
+        )
+        logger.error(error)
+        return {
+            "success": False,
+            "error": error,
+            "discrepancies": discrepancies,
+            "queue_drained": queue_drained,
+            "checksums_checked": 0,
+            "local_stats": local_stats,
+            "server_stats": server_stats,
+        }
+
+    for discrepancy in discrepancies:
+        logger.warning(f"Verification discrepancy for {version}: {discrepancy}")
+
+    return {
+        "success": not discrepancies,
+        "discrepancies": discrepancies,
+        "queue_drained": queue_drained,
+        "checksums_checked": checksums_checked,
+        "local_stats": local_stats,
+        "server_stats": server_stats,
+    }
@@ -0,0 +1,243 @@
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+# Request latency histogram buckets in seconds, as used by Prometheus clients
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class StageTimer:
+    """Handle returned by Metrics.stage() for reporting work done in a stage"""
+
+    def __init__(self):
+        self.items = 0
+        self.bytes = 0
+
+    def add(self, items: int = 0, bytes: int = 0):
+        self.items += items
+        self.bytes += bytes
+
+
+class Metrics:
+    """
+    Lightweight, thread-safe registry of pipeline performance metrics
+
+    Records wall time, call counts, item and byte counts per stage, request
+    latency histograms per endpoint and, when memory tracking is enabled,
+    peak traced memory per stage. Export with to_dict(), to_json() or
+    to_prometheus().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._track_memory = False
+        self.reset()
+
+    def reset(self):
+        """Clear all recorded metrics"""
+        with self._lock:
+            self.stages = {}
+            self.requests = {}
+            self._active_stages = 0
+
+    def track_memory(self, enabled: bool = True):
+        """
+        Enable or disable peak memory tracking via tracemalloc
+
+        Tracing slows down allocation-heavy code considerably, so it is off
+        by default. Peaks are process-wide; when stages overlap in different
+        threads, each stage reports the peak since the first of them started.
+        """
+        self._track_memory = enabled
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @property
+    def tracking_memory(self) -> bool:
+        return self._track_memory
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageTimer]:
+        """Time a block of work as one call of the named stage"""
+        timer = StageTimer()
+        tracing = self._track_memory and tracemalloc.is_tracing()
+        with self._lock:
+            if tracing and self._active_stages == 0:
+                tracemalloc.reset_peak()
+            self._active_stages += 1
+
+        start = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if tracing else None
+            with self._lock:
+                self._active_stages -= 1
+                stats = self.stages.setdefault(
+                    name,
+                    {"calls": 0, "seconds": 0.0, "items": 0, "bytes": 0, "peak_memory_bytes": None},
+                )
+                stats["calls"] += 1
+                stats["seconds"] += elapsed
+                stats["items"] += timer.items
+                stats["bytes"] += timer.bytes
+                if peak is not None:
+                    stats["peak_memory_bytes"] = max(stats["peak_memory_bytes"] or 0, peak)
+
+    def observe_request(
+        self, endpoint: str, seconds: float, bytes_sent: int = 0, failed: bool = False
+    ):
+        """Record the latency and size of a single server request"""
+        with self._lock:
+            stats = self.requests.setdefault(
+                endpoint,
+                {
+                    "count": 0,
+                    "failed": 0,
+                    "seconds": 0.0,
+                    "bytes_sent": 0,
+                    "buckets": [0] * len(LATENCY_BUCKETS),
+                },
+            )
+            stats["count"] += 1
+            stats["seconds"] += seconds
+            stats["bytes_sent"] += bytes_sent
+            if failed:
+                stats["failed"] += 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats["buckets"][i] += 1
+
+    def merge(self, data: Dict[str, Any]):
+        """
+        Add metrics recorded elsewhere, e.g. in a worker process, to this registry
+
+        Args:
+            data: Snapshot as returned by to_dict()
+        """
+        with self._lock:
+            for name, other in data.get("stages", {}).items():
+                stats = self.stages.setdefault(
+                    name,
+                    {"calls": 0, "seconds": 0.0, "items": 0, "bytes": 0, "peak_memory_bytes": None},
+                )
+                for key in ["calls", "seconds", "items", "bytes"]:
+                    stats[key] += other[key]
+                if other["peak_memory_bytes"] is not None:
+                    stats["peak_memory_bytes"] = max(
+                        stats["peak_memory_bytes"] or 0, other["peak_memory_bytes"]
+                    )
+            for endpoint, other in data.get("requests", {}).items():
+                stats = self.requests.setdefault(
+                    endpoint,
+                    {
+                        "count": 0,
+                        "failed": 0,
+                        "seconds": 0.0,
+                        "bytes_sent": 0,
+                        "buckets": [0] * len(LATENCY_BUCKETS),
+                    },
+                )
+                for key in ["count", "failed", "seconds", "bytes_sent"]:
+                    stats[key] += other[key]
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    stats["buckets"][i] += other["buckets"].get(str(bound), 0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Snapshot of all metrics with derived throughput figures"""
+        with self._lock:
+            stages = {}
+            for name, stats in self.stages.items():
+                stages[name] = dict(stats)
+                seconds = stats["seconds"]
+                stages[name]["items_per_second"] = (
+                    stats["items"] / seconds if seconds else None
+                )
+            requests = {}
+            for endpoint, stats in self.requests.items():
+                requests[endpoint] = dict(stats)
+                requests[endpoint]["buckets"] = dict(
+                    zip([str(b) for b in LATENCY_BUCKETS], stats["buckets"])
+                )
+                requests[endpoint]["mean_seconds"] = (
+                    stats["seconds"] / stats["count"] if stats["count"] else None
+                )
+            return {"stages": stages, "requests": requests}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "etl") -> str:
+        """Render metrics in the Prometheus text exposition format"""
+        data = self.to_dict()
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        stage_metrics = [
+            ("stage_seconds_total", "seconds", "Wall time spent in each stage"),
+            ("stage_calls_total", "calls", "Number of times each stage ran"),
+            ("stage_items_total", "items", "Rows or items processed by each stage"),
+            ("stage_bytes_total", "bytes", "Bytes sent by each stage"),
+        ]
+        for name, key, help_text in stage_metrics:
+            metric(name, "counter", help_text)
+            for stage, stats in data["stages"].items():
+                lines.append(f'{prefix}_{name}{{stage="{stage}"}} {stats[key]}')
+
+        metric("stage_peak_memory_bytes", "gauge", "Peak traced memory during each stage")
+        for stage, stats in data["stages"].items():
+            if stats["peak_memory_bytes"] is not None:
+                lines.append(
+                    f'{prefix}_stage_peak_memory_bytes{{stage="{stage}"}} {stats["peak_memory_bytes"]}'
+                )
+
+        metric("request_duration_seconds", "histogram", "Server request latency")
+        for endpoint, stats in data["requests"].items():
+            for bound, count in stats["buckets"].items():
+                lines.append(
+                    f'{prefix}_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}'
+                )
+            lines.append(
+                f'{prefix}_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {stats["count"]}'
+            )
+            lines.append(
+                f'{prefix}_request_duration_seconds_sum{{endpoint="{endpoint}"}} {stats["seconds"]}'
+            )
+            lines.append(
+                f'{prefix}_request_duration_seconds_count{{endpoint="{endpoint}"}} {stats["count"]}'
+            )
+
+        metric("request_bytes_sent_total", "counter", "Request body bytes sent")
+        for endpoint, stats in data["requests"].items():
+            lines.append(
+                f'{prefix}_request_bytes_sent_total{{endpoint="{endpoint}"}} {stats["bytes_sent"]}'
+            )
+
+        metric("requests_failed_total", "counter", "Failed server requests")
+        for endpoint, stats in data["requests"].items():
+            lines.append(
+                f'{prefix}_requests_failed_total{{endpoint="{endpoint}"}} {stats["failed"]}'
+            )
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write metrics to a file, as Prometheus text for .prom/.txt paths, else JSON"""
+        content = (
+            self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        )
+        with open(path, "w") as f:
+            f.write(content)
+
+
+# Process-wide registry used by the extract, transform and load modules
+metrics = Metrics()
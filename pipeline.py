@@ -0,0 +1,312 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Tuple
+
+import extract
+import transform
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+def _build(data: Dict, schema: Dict, validation: str, label: Any) -> Any:
+    """Validate extracted data according to the validation mode and build its graph"""
+    if validation != "off":
+        import validate
+
+        try:
+            report = validate.validate_data(data, schema)
+        except Exception as e:
+            if validation == "strict":
+                raise
+            # Validation only warns in this mode, so its failure mustn't stop the build
+            logger.error(f"Could not validate {label}: {str(e)}", exc_info=True)
+        else:
+            for issue in report["issues"]:
+                logger.warning(f"Validation issue for {label}: {issue}")
+            if validation == "strict" and not report["valid"]:
+                raise ValueError(
+                    f"Validation failed with {len(report['issues'])} issues for {label}"
+                )
+    return transform.build_graph(data, schema)
+
+
+def _extract_and_transform(
+    path: str,
+    schema: Dict,
+    plan: extract.ExtractionPlan,
+    validation: str = "off",
+    track_memory: bool = False,
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Extract and transform a single ZIP file into a graph in a worker process
+
+    Returns:
+        (graph, metrics) tuple, where metrics are the stage metrics recorded
+        for this file, to be merged into the parent's registry
+    """
+    metrics.reset()
+    if track_memory:
+        metrics.track_memory()
+    data = extract.read_zip(path, plan)
+    graph = _build(data, schema, validation, path)
+    return graph, metrics.to_dict()
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Put an item on a bounded queue, giving up once the pipeline is stopped"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event) -> Any:
+    """Get an item from a queue, returning _DONE once the pipeline is stopped"""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def _add_time(stats: Dict[str, float], stage: str, seconds: float, lock: threading.Lock):
+    with lock:
+        stats[stage] = stats.get(stage, 0.0) + seconds
+
+
+def _extract_stage(data_files, plan, out_q, stop, stats, lock):
+    for timestamp, path in data_files:
+        start = time.perf_counter()
+        try:
+            item = (timestamp, extract.read_zip(path, plan), None)
+        except Exception as e:
+            logger.error(f"Error extracting data from {path}: {str(e)}")
+            item = (timestamp, None, e)
+        _add_time(stats, "extract", time.perf_counter() - start, lock)
+        if not _put(out_q, item, stop):
+            return
+    _put(out_q, _DONE, stop)
+
+
+def _transform_stage(schema, validation, in_q, out_q, stop, stats, lock):
+    while True:
+        item = _get(in_q, stop)
+        if item is _DONE:
+            break
+        timestamp, data, error = item
+        if error is None:
+            start = time.perf_counter()
+            try:
+                item = (timestamp, _build(data, schema, validation, timestamp), None)
+            except Exception as e:
+                logger.error(f"Error building graph for timestamp {timestamp}: {str(e)}")
+                item = (timestamp, None, e)
+            _add_time(stats, "transform", time.perf_counter() - start, lock)
+        if not _put(out_q, item, stop):
+            return
+    _put(out_q, _DONE, stop)
+
+
+def _process_pool_stage(
+    data_files, schema, plan, validation, workers, out_q, stop, stats, lock
+):
+    # Keep a bounded number of files in flight so finished graphs don't pile up
+    max_in_flight = workers + out_q.maxsize
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        files = iter(data_files)
+        exhausted = False
+        while not stop.is_set():
+            while not exhausted and len(pending) < max_in_flight:
+                try:
+                    timestamp, path = next(files)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.append(
+                    (
+                        timestamp,
+                        path,
+                        executor.submit(
+                            _extract_and_transform,
+                            path,
+                            schema,
+                            plan,
+                            validation,
+                            metrics.tracking_memory,
+                        ),
+                    )
+                )
+            if not pending:
+                break
+
+            timestamp, path, future = pending.pop(0)
+            start = time.perf_counter()
+            try:
+                graph, worker_metrics = future.result()
+                metrics.merge(worker_metrics)
+                item = (timestamp, graph, None)
+            except Exception as e:
+                logger.error(f"Error processing {path}: {str(e)}")
+                item = (timestamp, None, e)
+            _add_time(stats, "extract_transform_wait", time.perf_counter() - start, lock)
+            if not _put(out_q, item, stop):
+                break
+
+        if stop.is_set():
+            for _, _, future in pending:
+                future.cancel()
+    _put(out_q, _DONE, stop)
+
+
+def iter_graphs(
+    data_files: List[Tuple[int, str]],
+    schema: Dict,
+    workers: int = 1,
+    queue_size: int = 2,
+    stats: Dict[str, float] = None,
+    validation: str = "off",
+) -> Iterator[Tuple[int, Any, Exception]]:
+    """
+    Extract and transform data files in background stages, yielding graphs in order
+
+    Extraction and graph building run in background threads (or a process pool
+    when workers > 1) connected by bounded queues, so the next snapshots are
+    parsed while the caller uploads the current one. At most queue_size
+    finished items are buffered between stages.
+
+    Args:
+        data_files: List of (timestamp, path) tuples sorted by timestamp
+        schema: Graph schema
+        workers: Number of worker processes, 1 to use background threads
+        queue_size: Maximum number of items buffered between stages
+        stats: Optional dictionary that receives busy seconds per stage
+        validation: "off", "warn" to log validate.validate_data issues, or
+            "strict" to also fail snapshots that have issues
+
+    Yields:
+        (timestamp, graph, error) tuples in timestamp order; graph is None
+        and error is set if the file could not be processed
+    """
+    stats = stats if stats is not None else {}
+    lock = threading.Lock()
+    stop = threading.Event()
+    graph_q = queue.Queue(maxsize=queue_size)
+    plan = extract.compile_plan(schema)
+
+    if workers > 1:
+        threads = [
+            threading.Thread(
+                target=_process_pool_stage,
+                args=(data_files, schema, plan, validation, workers, graph_q, stop, stats, lock),
+                daemon=True,
+            )
+        ]
+    else:
+        data_q = queue.Queue(maxsize=queue_size)
+        threads = [
+            threading.Thread(
+                target=_extract_stage,
+                args=(data_files, plan, data_q, stop, stats, lock),
+                daemon=True,
+            ),
+            threading.Thread(
+                target=_transform_stage,
+                args=(schema, validation, data_q, graph_q, stop, stats, lock),
+                daemon=True,
+            ),
+        ]
+
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item = _get(graph_q, stop)
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def run_pipeline(
+    data_files: List[Tuple[int, str]],
+    schema: Dict,
+    upload_fn,
+    workers: int = 1,
+    queue_size: int = 2,
+    keep_going: bool = False,
+    validation: str = "off",
+) -> Dict[str, Any]:
+    """
+    Run extract, transform and upload as overlapping stages
+
+    Args:
+        data_files: List of (timestamp, path) tuples sorted by timestamp
+        schema: Graph schema
+        upload_fn: Called as upload_fn(idx, timestamp, graph) for each graph in
+            timestamp order; returns True on success
+        workers: Number of worker processes for extract/transform
+        queue_size: Maximum number of items buffered between stages
+        keep_going: Continue with later timestamps after a failure
+        validation: Validation mode, see iter_graphs
+
+    Returns:
+        Dictionary with processed and failed timestamps and per-stage timings
+    """
+    stats = {}
+    processed = []
+    failed = []
+    start = time.perf_counter()
+
+    for idx, (timestamp, graph, error) in enumerate(
+        iter_graphs(
+            data_files,
+            schema,
+            workers=workers,
+            queue_size=queue_size,
+            stats=stats,
+            validation=validation,
+        )
+    ):
+        success = False
+        if error is None:
+            upload_start = time.perf_counter()
+            success = upload_fn(idx, timestamp, graph)
+            stats["upload"] = stats.get("upload", 0.0) + time.perf_counter() - upload_start
+
+        if success:
+            processed.append(timestamp)
+        else:
+            failed.append(timestamp)
+            if not keep_going:
+                break
+
+    stats["wall"] = time.perf_counter() - start
+    logger.info(
+        "Pipeline finished in {:.2f}s ({})".format(
+            stats["wall"],
+            ", ".join(f"{k}={v:.2f}s" for k, v in stats.items() if k != "wall"),
+        )
+    )
+
+    return {
+        "success": not failed,
+        "processed": processed,
+        "failed": failed,
+        "stage_seconds": stats,
+    }
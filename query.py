@@ -0,0 +1,201 @@
+import copy
+from collections import deque
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set
+
+from transform import normalize_key
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+
+class GraphIndex:
+    """
+    Indexes over a built graph for fast node lookup and neighborhood queries
+
+    Nodes are indexed by (node type, primary key) and by type. Attribute
+    values are indexed for the attributes given up front, and for any other
+    attribute the first time it is used in a filter, so repeated queries
+    don't scan the graph.
+    """
+
+    def __init__(self, G: "nx.Graph", attributes: Iterable[str] = ()):
+        self.graph = G
+        self.by_type: Dict[str, List[Any]] = {}
+        self.by_attribute: Dict[str, Dict[Any, Set[Any]]] = {}
+
+        # build_graph already keeps a primary key map, reuse it when present
+        pk_map = G.graph.get("node_pk_map")
+        if pk_map is None:
+            pk_map = {}
+            for node, attrs in G.nodes(data=True):
+                node_type = attrs.get("type", "default")
+                pk_key = normalize_key(attrs.get("pk_value", node))
+                if pk_key is not None:
+                    pk_map.setdefault(node_type, {})[pk_key] = node
+        self.by_key: Dict[str, Dict[str, Any]] = pk_map
+
+        for node, attrs in G.nodes(data=True):
+            self.by_type.setdefault(attrs.get("type", "default"), []).append(node)
+
+        for attribute in attributes:
+            self._index_attribute(attribute)
+
+    def bind(self, G: Optional["nx.Graph"]) -> "GraphIndex":
+        """
+        Copy of this index for another graph with the same nodes and attributes
+
+        The copy shares the lookup tables, including attribute indexes built
+        later, so an index can be kept while its graph is rebuilt or released.
+        """
+        index = copy.copy(self)
+        index.graph = G
+        return index
+
+    def _index_attribute(self, attribute: str) -> Dict[Any, Set[Any]]:
+        index = self.by_attribute.get(attribute)
+        if index is None:
+            index = {}
+            for node, value in self.graph.nodes(data=attribute):
+                if value is not None:
+                    index.setdefault(_index_value(value), set()).add(node)
+            self.by_attribute[attribute] = index
+        return index
+
+    @property
+    def node_types(self) -> List[str]:
+        return sorted(self.by_type)
+
+    def lookup(self, node_type: str, pk_value: Any) -> Optional[Any]:
+        """
+        Node ID for a node type and primary key value, or None
+
+        The value is normalized like build_graph normalizes keys, so "1.0"
+        finds the node with key 1.
+        """
+        return self.by_key.get(node_type, {}).get(normalize_key(pk_value))
+
+    def find(
+        self,
+        node_type: str = None,
+        limit: int = None,
+        filters: Dict[str, Any] = None,
+    ) -> List[Any]:
+        """
+        Nodes whose attributes equal all given values
+
+        Args:
+            node_type: Only return nodes of this type
+            limit: Maximum number of nodes to return
+            filters: Attribute name/value pairs to match, e.g. {"Country": "US"}
+
+        Returns:
+            List of matching node IDs
+        """
+        candidates = None
+        for attribute, value in (filters or {}).items():
+            matches = self._index_attribute(attribute).get(_index_value(value), set())
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+
+        check_type = False
+        if candidates is None:
+            candidates = self.by_type.get(node_type, []) if node_type else self.graph.nodes
+        elif node_type:
+            check_type = True
+
+        result = []
+        for node in candidates:
+            if check_type and self.graph.nodes[node].get("type") != node_type:
+                continue
+            result.append(node)
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+    def neighbors(
+        self, node: Any, node_type: str = None, edge_type: str = None
+    ) -> List[Any]:
+        """Direct neighbors of a node, optionally restricted by node or edge type"""
+        result = []
+        for neighbor, edge_attrs in self.graph.adj[node].items():
+            if edge_type and edge_attrs.get("type") != edge_type:
+                continue
+            if node_type and self.graph.nodes[neighbor].get("type") != node_type:
+                continue
+            result.append(neighbor)
+        return result
+
+    def neighborhood(
+        self,
+        node: Any,
+        hops: int = 1,
+        node_types: Iterable[str] = None,
+        max_nodes: int = None,
+    ) -> List[Any]:
+        """
+        Nodes within a number of hops of a node, in breadth-first order
+
+        Args:
+            node: Node to start from
+            hops: Maximum distance from the start node
+            node_types: Only traverse nodes of these types
+            max_nodes: Stop once this many nodes have been collected
+
+        Returns:
+            List of node IDs, starting with the start node
+        """
+        node_types = set(node_types) if node_types else None
+        seen = {node}
+        order = [node]
+        frontier = deque([(node, 0)])
+
+        while frontier:
+            current, depth = frontier.popleft()
+            if depth >= hops:
+                continue
+            for neighbor in self.graph.adj[current]:
+                if neighbor in seen:
+                    continue
+                if node_types and self.graph.nodes[neighbor].get("type") not in node_types:
+                    continue
+                seen.add(neighbor)
+                order.append(neighbor)
+                if max_nodes is not None and len(order) >= max_nodes:
+                    return order
+                frontier.append((neighbor, depth + 1))
+
+        return order
+
+    def subgraph(self, nodes: Iterable[Any]) -> "nx.Graph":
+        """View of the graph restricted to the given nodes"""
+        return self.graph.subgraph(nodes)
+
+
+def _index_value(value: Any) -> Any:
+    """Normalize attribute values so that e.g. 1000, 1000.0 and "1000" match"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def parse_query(text: str) -> Dict[str, str]:
+    """
+    Parse a search box query
+
+    "key" looks a node up by primary key; "attr=value; attr2=value2" filters
+    by attribute values.
+
+    Returns:
+        Dictionary with either a "key" entry or attribute filters
+    """
+    text = text.strip()
+    if "=" not in text:
+        return {"key": text}
+
+    filters = {}
+    for part in text.split(";"):
+        if "=" in part:
+            attribute, value = part.split("=", 1)
+            filters[attribute.strip()] = value.strip()
+    return {"filters": filters}
@@ -0,0 +1,169 @@
+import argparse
+import gzip
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Tuple
+
+from load import HttpTransport, RecordingTransport
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_ENDPOINT_PREFIX = b'{"endpoint": '
+
+
+def read_recording(path: str, version: str = None) -> Iterator[Tuple[str, bytes]]:
+    """
+    Read a recording written by RecordingTransport
+
+    Bodies are returned as the raw recorded bytes, so replaying does not
+    re-encode them unless the version is overridden.
+
+    Args:
+        path: Path to the gzip-compressed NDJSON recording
+        version: Optional version to write into every Change instead of the recorded one
+
+    Yields:
+        (endpoint, body) tuples in recording order
+    """
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            line = line.rstrip(b"\n")
+            if not line:
+                continue
+
+            split = line.find(RecordingTransport.BODY_KEY)
+            if line.startswith(_ENDPOINT_PREFIX) and split > 0:
+                endpoint = json.loads(line[len(_ENDPOINT_PREFIX) : split])
+                body = line[split + len(RecordingTransport.BODY_KEY) : -1]
+            else:
+                record = json.loads(line)
+                endpoint = record["endpoint"]
+                body = json.dumps(record["body"]).encode("utf-8")
+
+            if version is not None:
+                change = json.loads(body)
+                changes = change if isinstance(change, list) else [change]
+                for item in changes:
+                    item["version"] = version
+                body = json.dumps(change).encode("utf-8")
+
+            yield endpoint, body
+
+
+def replay_recording(
+    path: str,
+    base_url: str,
+    rate: float = None,
+    concurrency: int = 1,
+    version: str = None,
+    stop_on_error: bool = True,
+) -> Dict[str, Any]:
+    """
+    Send a recording to a graph server at a controlled rate and concurrency
+
+    With concurrency 1, requests are sent in recording order, which is what
+    the server expects when replaying an upload. Higher concurrency is meant
+    for load tests and does not preserve ordering between requests.
+
+    Args:
+        path: Path to the recording
+        base_url: Server API URL, e.g. http://localhost:8000/api
+        rate: Maximum requests per second, None for no limit
+        concurrency: Number of requests in flight at once
+        version: Optional version to replay into instead of the recorded one
+        stop_on_error: Stop sending after the first failed request
+
+    Returns:
+        Dictionary with counts of sent and failed requests, bytes and timing
+    """
+    # requests.Session is not thread-safe, give each worker thread its own
+    local = threading.local()
+    in_flight = threading.BoundedSemaphore(concurrency)
+    stop = threading.Event()
+    lock = threading.Lock()
+    result = {"sent": 0, "failed": 0, "bytes_sent": 0}
+
+    def send(endpoint: str, body: bytes):
+        start = time.perf_counter()
+        try:
+            if not hasattr(local, "transport"):
+                local.transport = HttpTransport(base_url)
+            local.transport.request("post", endpoint, body)
+            failed = False
+        except Exception as e:
+            logger.error(f"Error replaying request to {endpoint}: {str(e)}")
+            failed = True
+            if stop_on_error:
+                stop.set()
+        finally:
+            in_flight.release()
+
+        metrics.observe_request(endpoint, time.perf_counter() - start, len(body), failed)
+        with lock:
+            result["failed" if failed else "sent"] += 1
+            if not failed:
+                result["bytes_sent"] += len(body)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for idx, (endpoint, body) in enumerate(read_recording(path, version=version)):
+            if rate:
+                delay = start + idx / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            in_flight.acquire()
+            if stop.is_set():
+                in_flight.release()
+                break
+            executor.submit(send, endpoint, body)
+
+    result["seconds"] = time.perf_counter() - start
+    result["success"] = result["failed"] == 0
+    logger.info(
+        f"Replayed {result['sent']} requests ({result['failed']} failed, "
+        f"{result['bytes_sent']} bytes) in {result['seconds']:.2f}s"
+    )
+    return result
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded upload against a graph server"
+    )
+    parser.add_argument("recording", help="Path to a .ndjson.gz recording")
+    parser.add_argument(
+        "--server-url",
+        default="http://localhost:8000/api",
+        help="Graph server API URL",
+    )
+    parser.add_argument("--rate", type=float, help="Maximum requests per second")
+    parser.add_argument(
+        "--concurrency", type=int, default=1, help="Number of requests in flight"
+    )
+    parser.add_argument("--version", help="Replay into this version instead")
+    parser.add_argument(
+        "--keep-going", action="store_true", help="Continue after failed requests"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    result = replay_recording(
+        args.recording,
+        args.server_url,
+        rate=args.rate,
+        concurrency=args.concurrency,
+        version=args.version,
+        stop_on_error=not args.keep_going,
+    )
+    return 0 if result["success"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
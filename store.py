@@ -0,0 +1,220 @@
+import gzip
+import logging
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from itertools import islice
+from typing import Any, Dict, Hashable, Iterator
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Default RAM budget in megabytes, overridable with the GRAPH_STORE_BUDGET_MB
+# environment variable
+DEFAULT_BUDGET_MB = float(os.getenv("GRAPH_STORE_BUDGET_MB", "512"))
+
+# Number of items per container measured when estimating sizes
+SIZE_SAMPLE = 20
+
+
+def estimate_size(value: Any, sample: int = SIZE_SAMPLE) -> int:
+    """
+    Estimate the memory used by a value in bytes
+
+    Containers are measured on a sample of their items and extrapolated, so
+    large graphs and record lists are sized quickly. Objects such as networkx
+    graphs are measured through their attribute dictionaries, and objects
+    reachable more than once (e.g. edge attributes, which networkx shares
+    between both endpoints) are only counted once.
+    """
+    return _estimate_size(value, sample, set())
+
+
+def _estimate_size(value: Any, sample: int, seen: set) -> int:
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        items = list(islice(value.items(), sample))
+        if items:
+            per_item = sum(
+                _estimate_size(k, sample, seen) + _estimate_size(v, sample, seen)
+                for k, v in items
+            ) / len(items)
+            size += int(per_item * len(value))
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = list(islice(value, sample))
+        if items:
+            per_item = sum(_estimate_size(v, sample, seen) for v in items) / len(items)
+            size += int(per_item * len(value))
+    elif hasattr(value, "__dict__") and not isinstance(value, type):
+        size += _estimate_size(vars(value), sample, seen)
+    return size
+
+
+class GraphStore(MutableMapping):
+    """
+    Mapping of snapshots (graphs or extracted data) kept within a RAM budget
+
+    Recently used values stay in memory. When the estimated size of the
+    in-memory values exceeds the budget, the least recently used ones are
+    pickled to gzip files in a private spill directory and loaded again the
+    next time they are accessed. The most recently used value always stays
+    in memory, even if it alone exceeds the budget.
+
+    Values loaded back from disk are assumed to be unchanged; assign them
+    again after modifying them so the change survives the next spill. The
+    spill directory is removed when the store is closed or garbage collected.
+    """
+
+    def __init__(self, budget_mb: float = None, spill_root: str = None):
+        budget_mb = DEFAULT_BUDGET_MB if budget_mb is None else budget_mb
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        if spill_root:
+            os.makedirs(spill_root, exist_ok=True)
+        self.spill_dir = tempfile.mkdtemp(prefix="graph-store-", dir=spill_root)
+        self._finalizer = weakref.finalize(
+            self, shutil.rmtree, self.spill_dir, ignore_errors=True
+        )
+        self._lock = threading.RLock()
+        # key -> (value, estimated size), least recently used first
+        self._memory: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # key -> spill file path, for every key whose latest value is on disk
+        self._spilled: Dict[Hashable, str] = {}
+        # key -> estimated size, kept so values loaded from disk aren't re-measured
+        self._sizes: Dict[Hashable, int] = {}
+        self.memory_bytes = 0
+        self.spills = 0
+        self.loads = 0
+
+    def __setitem__(self, key: Hashable, value: Any):
+        with self._lock:
+            self._drop(key)
+            size = estimate_size(value)
+            self._memory[key] = (value, size)
+            self._sizes[key] = size
+            self.memory_bytes += size
+            self._evict()
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key][0]
+            if key not in self._spilled:
+                raise KeyError(key)
+
+            value = self._load(key)
+            size = self._sizes[key]
+            self._memory[key] = (value, size)
+            self.memory_bytes += size
+            self._evict()
+            return value
+
+    def __delitem__(self, key: Hashable):
+        with self._lock:
+            if key not in self._sizes:
+                raise KeyError(key)
+            self._drop(key)
+            del self._sizes[key]
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._sizes))
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._sizes
+
+    def _path(self) -> str:
+        return os.path.join(self.spill_dir, f"{self.spills}.pkl.gz")
+
+    def _drop(self, key: Hashable):
+        """Forget the stored value of a key, in memory and on disk"""
+        if key in self._memory:
+            _, size = self._memory.pop(key)
+            self.memory_bytes -= size
+        path = self._spilled.pop(key, None)
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+    def _evict(self):
+        """Spill least recently used values until memory is within budget"""
+        while self.memory_bytes > self.budget_bytes and len(self._memory) > 1:
+            key, (value, size) = self._memory.popitem(last=False)
+            self.memory_bytes -= size
+            if key not in self._spilled:
+                self._spill(key, value)
+
+    def _spill(self, key: Hashable, value: Any):
+        path = self._path()
+        with metrics.stage("store.spill") as timer:
+            with gzip.open(path, "wb", compresslevel=1) as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            timer.add(items=1, bytes=os.path.getsize(path))
+        self._spilled[key] = path
+        self.spills += 1
+        logger.debug(f"Spilled {key} to {path}")
+
+    def _load(self, key: Hashable) -> Any:
+        path = self._spilled[key]
+        with metrics.stage("store.load") as timer:
+            with gzip.open(path, "rb") as f:
+                value = pickle.load(f)
+            timer.add(items=1, bytes=os.path.getsize(path))
+        self.loads += 1
+        logger.debug(f"Loaded {key} from {path}")
+        return value
+
+    def in_memory(self, key: Hashable) -> bool:
+        """Whether a key's value is currently held in memory"""
+        return key in self._memory
+
+    def stats(self) -> Dict[str, Any]:
+        """Counts and sizes of in-memory and spilled values"""
+        with self._lock:
+            return {
+                "items": len(self._sizes),
+                "in_memory": len(self._memory),
+                "spilled": len(self._sizes) - len(self._memory),
+                "memory_bytes": self.memory_bytes,
+                "budget_bytes": self.budget_bytes,
+                "disk_bytes": sum(
+                    os.path.getsize(path)
+                    for path in self._spilled.values()
+                    if os.path.exists(path)
+                ),
+                "spills": self.spills,
+                "loads": self.loads,
+            }
+
+    def clear(self):
+        """Remove all values, including spilled files"""
+        with self._lock:
+            for path in self._spilled.values():
+                if os.path.exists(path):
+                    os.remove(path)
+            self._memory.clear()
+            self._spilled.clear()
+            self._sizes.clear()
+            self.memory_bytes = 0
+
+    def close(self):
+        """Remove all values and the spill directory"""
+        self.clear()
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,344 @@
+import base64
+import gzip
+import json
+import logging
+import os
+import zlib
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+from load import (
+    GraphServer,
+    HttpTransport,
+    edge_to_payload,
+    node_to_payload,
+    payload_checksum,
+)
+from metrics import metrics
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+logger = logging.getLogger(__name__)
+
+LIVE_CACHE_DIR = "cache/live"
+
+
+def node_key(item: Dict[str, Any]) -> str:
+    return str(item["node_id"])
+
+
+def edge_key(item: Dict[str, Any]) -> str:
+    """Key of an edge payload; endpoints are sorted since the graph is undirected"""
+    source, target = sorted([str(item["source_id"]), str(item["target_id"])])
+    return json.dumps([source, target, item.get("edge_type", "default")])
+
+
+def node_hash(item: Dict[str, Any]) -> str:
+    return payload_checksum(
+        {
+            "node_type": item.get("node_type", "default"),
+            "label": item.get("label"),
+            "properties": item.get("properties", {}),
+        }
+    )
+
+
+def edge_hash(item: Dict[str, Any]) -> str:
+    return payload_checksum(
+        {
+            "edge_type": item.get("edge_type", "default"),
+            "label": item.get("label"),
+            "properties": item.get("properties", {}),
+        }
+    )
+
+
+def _decode_compressed(response: Any) -> Any:
+    """Decode a compressed schema response (base64 gzip/zlib JSON) if needed"""
+    if not isinstance(response, str):
+        return response
+    raw = base64.b64decode(response)
+    try:
+        raw = gzip.decompress(raw)
+    except OSError:
+        raw = zlib.decompress(raw)
+    return json.loads(raw)
+
+
+def _is_not_found(error: Exception) -> bool:
+    """Whether a request failed because the server has no such resource"""
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code == 404
+
+
+def _find_list(live: Dict[str, Any], names: List[str]) -> List[Dict[str, Any]]:
+    for name in names:
+        if isinstance(live.get(name), list):
+            return live[name]
+    for value in live.values():
+        if isinstance(value, dict):
+            found = _find_list(value, names)
+            if found:
+                return found
+    return []
+
+
+def _as_node_payload(item: Dict[str, Any]) -> Dict[str, Any]:
+    if "node_id" in item and "properties" in item:
+        return item
+    # Node-link style node, e.g. {"id": ..., "type": ..., **attributes}
+    attrs = {k: v for k, v in item.items() if k not in ["id", "node_id"]}
+    return node_to_payload(item.get("node_id", item.get("id")), attrs)
+
+
+def _as_edge_payload(item: Dict[str, Any]) -> Dict[str, Any]:
+    if "source_id" in item and "properties" in item:
+        return item
+    # Node-link style link, e.g. {"source": ..., "target": ..., "type": ...}
+    attrs = {
+        k: v
+        for k, v in item.items()
+        if k not in ["source", "target", "source_id", "target_id"]
+    }
+    return edge_to_payload(
+        item.get("source_id", item.get("source")),
+        item.get("target_id", item.get("target")),
+        attrs,
+    )
+
+
+def build_state(
+    nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Hash node and edge payloads into a compact state for diffing and caching
+
+    Returns:
+        Dictionary with "nodes" mapping node IDs to hashes and "edges" mapping
+        edge keys to their hash and endpoint IDs
+    """
+    state = {"nodes": {}, "edges": {}}
+    for item in nodes:
+        state["nodes"][node_key(item)] = node_hash(item)
+    for item in edges:
+        state["edges"][edge_key(item)] = {
+            "hash": edge_hash(item),
+            "source_id": str(item["source_id"]),
+            "target_id": str(item["target_id"]),
+            "edge_type": item.get("edge_type", "default"),
+        }
+    return state
+
+
+def _cache_path(cache_dir: str, version: str, timestamp: int) -> str:
+    return os.path.join(cache_dir, version, f"{timestamp}.json.gz")
+
+
+def load_cached_state(cache_dir: str, version: str, timestamp: int) -> Dict[str, Any]:
+    """Cached live state for a version and processing timestamp, or None"""
+    path = _cache_path(cache_dir, version, timestamp)
+    if not timestamp or not os.path.exists(path):
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_cached_state(
+    state: Dict[str, Any], cache_dir: str, version: str, timestamp: int
+):
+    """Cache a live state, keyed by version and processing timestamp"""
+    path = _cache_path(cache_dir, version, timestamp)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(state, f)
+
+
+def fetch_live_state(
+    server: GraphServer, version: str, cache_dir: str = LIVE_CACHE_DIR
+) -> Dict[str, Any]:
+    """
+    Get the hashed live state of a version, from the local cache when possible
+
+    The cache is keyed by the server's processing timestamp for the version,
+    so a new fetch happens whenever the server has processed newer data.
+    """
+    try:
+        processing_timestamp = server.get_processing_timestamp(version)
+    except Exception as e:
+        if not _is_not_found(e):
+            raise
+        # Nothing processed for this version yet, so there is nothing to cache
+        processing_timestamp = 0
+
+    state = load_cached_state(cache_dir, version, processing_timestamp)
+    if state is not None:
+        logger.info(
+            f"Using cached live state for {version} at {processing_timestamp}"
+        )
+        return state
+
+    with metrics.stage("sync.fetch_live_state") as timer:
+        try:
+            live = _decode_compressed(server.get_live_schema(version))
+        except Exception as e:
+            if not _is_not_found(e):
+                raise
+            logger.info(f"Version {version} does not exist on the server yet")
+            live = {}
+
+        if not isinstance(live, dict):
+            live = {}
+        nodes = [_as_node_payload(n) for n in _find_list(live, ["nodes"])]
+        edges = [_as_edge_payload(e) for e in _find_list(live, ["edges", "links"])]
+        state = build_state(nodes, edges)
+        timer.add(items=len(nodes) + len(edges))
+
+    if processing_timestamp:
+        save_cached_state(state, cache_dir, version, processing_timestamp)
+    return state
+
+
+def diff_state(
+    local: Dict[str, Any], remote: Dict[str, Any]
+) -> Dict[str, List[str]]:
+    """Keys to create, update and delete to turn the remote state into the local one"""
+    diff = {}
+    for kind in ["nodes", "edges"]:
+        local_items = local[kind]
+        remote_items = remote.get(kind, {})
+
+        def digest(value):
+            return value["hash"] if isinstance(value, dict) else value
+
+        diff[kind] = {
+            "create": [k for k in local_items if k not in remote_items],
+            "update": [
+                k
+                for k in local_items
+                if k in remote_items
+                and digest(local_items[k]) != digest(remote_items[k])
+            ],
+            "delete": [k for k in remote_items if k not in local_items],
+        }
+    return diff
+
+
+def _cache_after_processing(
+    server: GraphServer,
+    state: Dict[str, Any],
+    cache_dir: str,
+    version: str,
+    timestamp: int,
+):
+    """Cache a sent state once the server's queue for the version has drained"""
+    try:
+        processed = server.wait_for_queue(version)
+    except Exception as e:
+        logger.warning(f"Could not check the queue for {version}, not caching: {e}")
+        return
+    if processed:
+        # The server's state for this timestamp now matches the graph
+        save_cached_state(state, cache_dir, version, timestamp)
+    else:
+        logger.warning(f"Queue for {version} did not drain, not caching live state")
+
+
+def sync_graph(
+    graph: "nx.Graph",
+    version: str,
+    timestamp: int,
+    server: GraphServer = None,
+    batch_size: int = 1000,
+    progress_bar=None,
+    cache_dir: str = LIVE_CACHE_DIR,
+) -> Dict[str, Any]:
+    """
+    Upload only the difference between a graph and the server's live state
+
+    Fetches the live schema of the version (or reuses the cached state for the
+    server's processing timestamp), compares per-node and per-edge hashes and
+    sends creates and updates for nodes, then edges, followed by deletes for
+    edges, then nodes. When changes are sent over HTTP, waits for the server
+    to process them and caches the graph's state as the live state for the
+    timestamp; recorded changes are never cached since no server applied them.
+
+    Args:
+        graph: Graph the version should match after the sync
+        version: Version to sync
+        timestamp: Timestamp of the snapshot
+        server: GraphServer to use, a new one is created if not given
+        batch_size: Number of items per request
+        progress_bar: Object with progress() and empty() methods
+        cache_dir: Directory for cached live states
+
+    Returns:
+        Dictionary with sync status and counts of created, updated, deleted
+        and unchanged items
+    """
+    server = server or GraphServer()
+    try:
+        nodes = [node_to_payload(n, attrs) for n, attrs in graph.nodes(data=True)]
+        edges = [edge_to_payload(u, v, attrs) for u, v, attrs in graph.edges(data=True)]
+        local = build_state(nodes, edges)
+        remote = fetch_live_state(server, version, cache_dir)
+        diff = diff_state(local, remote)
+
+        nodes_by_key = {node_key(item): item for item in nodes}
+        edges_by_key = {edge_key(item): item for item in edges}
+
+        def node_ids(keys: List[str]) -> List[Dict[str, Any]]:
+            return [{"node_id": key} for key in keys]
+
+        def edge_ids(keys: List[str]) -> List[Dict[str, Any]]:
+            return [
+                {
+                    "source_id": remote["edges"][key]["source_id"],
+                    "target_id": remote["edges"][key]["target_id"],
+                    "edge_type": remote["edges"][key]["edge_type"],
+                }
+                for key in keys
+            ]
+
+        changes: List[Tuple[str, List[Dict[str, Any]]]] = [
+            ("bulk_create", [nodes_by_key[k] for k in diff["nodes"]["create"]]),
+            ("bulk_update", [nodes_by_key[k] for k in diff["nodes"]["update"]]),
+            ("bulk_create", [edges_by_key[k] for k in diff["edges"]["create"]]),
+            ("bulk_update", [edges_by_key[k] for k in diff["edges"]["update"]]),
+            ("bulk_delete", edge_ids(diff["edges"]["delete"])),
+            ("bulk_delete", node_ids(diff["nodes"]["delete"])),
+        ]
+        changes = [(action, items) for action, items in changes if items]
+
+        counts = {
+            action: sum(len(diff[kind][action]) for kind in ["nodes", "edges"])
+            for action in ["create", "update", "delete"]
+        }
+        counts["unchanged"] = len(nodes) + len(edges) - counts["create"] - counts["update"]
+        logger.info(
+            f"Sync {version}@{timestamp}: {counts['create']} to create, {counts['update']} to update, "
+            f"{counts['delete']} to delete, {counts['unchanged']} unchanged"
+        )
+
+        if changes:
+            server.send_changes(
+                changes,
+                version=version,
+                timestamp=int(timestamp),
+                batch_size=batch_size,
+                progress_bar=progress_bar,
+            )
+            if isinstance(server.transport, HttpTransport):
+                _cache_after_processing(server, local, cache_dir, version, int(timestamp))
+
+        message = (
+            f"Synced {version}: created {counts['create']}, updated {counts['update']}, "
+            f"deleted {counts['delete']}, unchanged {counts['unchanged']}"
+        )
+        return {"success": True, "message": message, **counts}
+    except Exception as e:
+        error = f"Sync error: {str(e)}"
+        logger.error(error, exc_info=True)
+        return {"success": False, "error": error}
+    finally:
+        if progress_bar is not None:
+            progress_bar.empty()
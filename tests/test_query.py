@@ -0,0 +1,32 @@
+import networkx as nx
+
+import query
+import transform
+
+SCHEMA = {"nodes": [{"type": "part", "id": "Part"}], "edges": []}
+
+
+def test_lookup_normalizes_keys():
+    G = transform.build_graph({"part": [{"Part": 1}, {"Part": "2.0"}]}, SCHEMA)
+    index = query.GraphIndex(G)
+    assert index.lookup("part", "1.0") == index.lookup("part", 1) is not None
+    assert index.lookup("part", 2) == index.lookup("part", "2") is not None
+    assert index.lookup("part", "") is None
+
+
+def test_find_takes_filters_named_like_arguments():
+    G = nx.Graph()
+    G.add_node("a", type="part", limit="3")
+    G.add_node("b", type="part", limit="4")
+    index = query.GraphIndex(G)
+    assert index.find(limit=5, filters={"limit": "3"}) == ["a"]
+
+
+def test_bound_copies_share_lookup_tables():
+    G = transform.build_graph({"part": [{"Part": 1, "Group": "x"}]}, SCHEMA)
+    cached = query.GraphIndex(G).bind(None)
+    assert cached.graph is None
+
+    index = cached.bind(G)
+    assert index.find(filters={"Group": "x"}) == [index.lookup("part", 1)]
+    assert "Group" in cached.by_attribute
@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import validate
+from pipeline import _build
+from transform import normalize_key
+
+CASES = {
+    "integers": [1, 2, 3],
+    "large integers": [2**62, 2**63 - 1, -(2**63)],
+    "floats": [1.0, 2.5, -3.0, 0.0, float("nan")],
+    "non-finite floats": [1.0, float("inf"), float("-inf"), float("nan")],
+    "large integral floats": [2.0**53, 2.0**63, 2.0**70, -(2.0**64), 1e20],
+    "mixed integers and floats": [1, 2.0, 2**60 + 1, 3.5],
+    "text": ["1.0", "2", "", "x.0", "+3.00", "1.5", "1e5", None],
+}
+
+
+@pytest.mark.parametrize("values", CASES.values(), ids=CASES.keys())
+def test_normalize_keys_matches_normalize_key(values):
+    expected = [normalize_key(value) for value in values]
+    assert validate.normalize_keys(pd.Series(values, dtype=object)).tolist() == expected
+
+
+@pytest.mark.parametrize(
+    "values",
+    [[1.0, np.inf, -np.inf, np.nan], [2.0**63, 2.0**70, 4.0], [1.5, 2.0]],
+)
+def test_normalize_keys_float_dtype(values):
+    series = pd.Series(values, dtype="float64")
+    expected = [normalize_key(value) for value in series]
+    assert validate.normalize_keys(series).tolist() == expected
+
+
+def test_large_integral_float_keys_do_not_dangle():
+    schema = {
+        "nodes": [{"type": "part", "id": "Part"}],
+        "edges": [
+            {
+                "type": "part_to_part",
+                "source_node_type": "part",
+                "target_node_type": "part",
+            }
+        ],
+    }
+    data = {
+        "part": [{"Part": 2.0**63}, {"Part": 2.0**64}, {"Part": math.inf}],
+        "part_to_part": [{"A": 2.0**63, "B": 2.0**64}, {"A": math.inf, "B": 2.0**63}],
+    }
+    report = validate.validate_data(data, schema)
+    assert report["valid"], report["issues"]
+
+
+def test_validation_errors_only_fail_strict_builds(monkeypatch):
+    schema = {"nodes": [{"type": "part", "id": "Part"}], "edges": []}
+    data = {"part": [{"Part": 1}, {"Part": 2}]}
+
+    def broken(data, schema):
+        raise RuntimeError("validator bug")
+
+    monkeypatch.setattr(validate, "validate_data", broken)
+    assert _build(data, schema, "warn", "test").number_of_nodes() == 2
+    with pytest.raises(RuntimeError):
+        _build(data, schema, "strict", "test")
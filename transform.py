@@ -1,6 +1,12 @@
-import networkx as nx
-import pandas as pd
-from typing import Dict, List, Any
+import math
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
+
+from metrics import metrics
+
+if TYPE_CHECKING:
+    # networkx and pandas are imported on first use to keep imports fast
+    import networkx as nx
+    import pandas as pd
 
 
 def normalize_type(type_name: str) -> str:
@@ -8,10 +14,49 @@ def normalize_type(type_name: str) -> str:
     return type_name.replace(" ", "_")
 
 
-def build_graph(data: Dict[str, List[Dict]], schema: Dict[str, List[Dict]]) -> nx.Graph:
+def normalize_key(value: Any) -> Optional[str]:
+    """
+    Normalize a primary or foreign key value to its string form
+
+    Missing values (None, NaN, empty strings) become None, and integral floats
+    such as 1.0 (pandas' representation of integer columns with gaps) become
+    "1" so they match integer keys in other files. The same applies to their
+    text form "1.0", as key columns read with an extraction plan are strings.
+    """
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if value.is_integer():
+            return str(int(value))
+    value = str(value)
+    if "." in value:
+        return normalize_text_key(value)
+    return value if value != "" else None
+
+
+def normalize_text_key(value: str) -> str:
+    """Integer form of the text of an integral float, e.g. "1.0" -> "1", else the text"""
+    integer, _, fraction = value.partition(".")
+    if not fraction.strip("0") and integer.lstrip("+-").isdigit():
+        return str(int(integer))
+    return value
+
+
+def build_graph(data: Dict[str, List[Dict]], schema: Dict[str, List[Dict]]) -> "nx.Graph":
     """
     Build a graph based on the schema where nodes are connected based on primary key matches
     """
+    with metrics.stage("transform.build_graph") as timer:
+        G = _build_graph(data, schema)
+        timer.add(items=G.number_of_nodes() + G.number_of_edges())
+    return G
+
+
+def _build_graph(data: Dict[str, List[Dict]], schema: Dict[str, List[Dict]]) -> "nx.Graph":
+    import networkx as nx
+
     G = nx.Graph()
 
     # Normalize data keys
@@ -29,8 +74,8 @@ def build_graph(data: Dict[str, List[Dict]], schema: Dict[str, List[Dict]]) -> n
             node_pk_map[node_type] = {}
 
             for node_data in normalized_data[node_type]:
-                pk_value = str(node_data.get(pk_field))
-                if pk_value:
+                pk_value = normalize_key(node_data.get(pk_field))
+                if pk_value is not None:
                     # Create a unique node ID
                     node_id = f"{node_type}_{pk_value}"
                     # Add node with all its attributes
@@ -44,19 +89,24 @@ def build_graph(data: Dict[str, List[Dict]], schema: Dict[str, List[Dict]]) -> n
                     # Store mapping of primary key to node ID
                     node_pk_map[node_type][pk_value] = node_id
 
+    # Keep the primary key map with the graph for query.GraphIndex
+    G.graph["node_pk_map"] = node_pk_map
+
     for edge in schema["edges"]:
         # Get source and target types from the edge file name
         source_type, target_type = edge["source_node_type"], edge["target_node_type"]
 
         # Process each edge record
-        for edge_data in normalized_data[edge["type"]]:
-            # Get the first two columns as source and target
+        for edge_data in normalized_data.get(edge["type"], []):
+            # Use the schema's key columns, defaulting to the first two columns
             columns = list(edge_data.keys())
             if len(columns) < 2:
                 continue
+            source_col = edge.get("source_key") or columns[0]
+            target_col = edge.get("target_key") or columns[1]
 
-            source_pk = str(edge_data[columns[0]])
-            target_pk = str(edge_data[columns[1]])
+            source_pk = normalize_key(edge_data.get(source_col))
+            target_pk = normalize_key(edge_data.get(target_col))
 
             # Check if we have both nodes
             if (
@@ -73,7 +123,7 @@ def build_graph(data: Dict[str, List[Dict]], schema: Dict[str, List[Dict]]) -> n
                 edge_props = {
                     k: v
                     for k, v in edge_data.items()
-                    if k not in [columns[0], columns[1]]
+                    if k not in [source_col, target_col]
                 }
                 edge_props["type"] = edge["type"]  # Add edge type property
                 G.add_edge(source_id, target_id, **edge_props)
@@ -81,8 +131,10 @@ def build_graph(data: Dict[str, List[Dict]], schema: Dict[str, List[Dict]]) -> n
     return G
 
 
-def get_node_features(G: nx.Graph, node_type: str) -> pd.DataFrame:
+def get_node_features(G: "nx.Graph", node_type: str) -> "pd.DataFrame":
     """Get features for nodes of a specific type"""
+    import pandas as pd
+
     nodes = [
         (n, attr) for n, attr in G.nodes(data=True) if attr.get("type") == node_type
     ]
@@ -92,8 +144,10 @@ def get_node_features(G: nx.Graph, node_type: str) -> pd.DataFrame:
     return pd.DataFrame([attr for _, attr in nodes])
 
 
-def get_edge_features(G: nx.Graph, edge_type: str) -> pd.DataFrame:
+def get_edge_features(G: "nx.Graph", edge_type: str) -> "pd.DataFrame":
     """Get features for edges of a specific type"""
+    import pandas as pd
+
     edges = [
         (u, v, attr)
         for u, v, attr in G.edges(data=True)
@@ -105,8 +159,14 @@ def get_edge_features(G: nx.Graph, edge_type: str) -> pd.DataFrame:
     return pd.DataFrame([attr for _, _, attr in edges])
 
 
-def export_features(G: nx.Graph, schema: Dict[str, List[Dict]], output_dir: str):
+def export_features(G: "nx.Graph", schema: Dict[str, List[Dict]], output_dir: str):
     """Export node and edge features to CSV files"""
+    with metrics.stage("transform.export_features") as timer:
+        _export_features(G, schema, output_dir)
+        timer.add(items=G.number_of_nodes() + G.number_of_edges())
+
+
+def _export_features(G: "nx.Graph", schema: Dict[str, List[Dict]], output_dir: str):
     import os
 
     # Create output directory if it doesn't exist
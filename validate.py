@@ -0,0 +1,209 @@
+import logging
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from metrics import metrics
+from transform import normalize_key, normalize_text_key, normalize_type
+
+logger = logging.getLogger(__name__)
+
+# Number of offending key values included in the report per check
+SAMPLE_SIZE = 5
+
+# Text form of a decimal number, for key columns read as strings
+NUMERIC_TEXT = r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?"
+
+
+def _key_series(records: List[Dict], column: str) -> pd.Series:
+    """Raw values of one column across a list of records"""
+    return pd.Series([record.get(column) for record in records], dtype=object)
+
+
+def key_kind(values: pd.Series) -> str:
+    """
+    Kind of values in a key column as inferred by pandas, e.g. string or integer
+
+    Text keys (as read with an extraction plan) that all look like numbers are
+    reported as integer or floating, the kind pandas would have parsed them as.
+    """
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind == "string":
+        kind = _text_key_kind(values)
+    return kind
+
+
+def _text_key_kind(values: pd.Series) -> str:
+    text = values[values.notna() & (values != "")]
+    if text.empty:
+        return "empty"
+    # Most text keys aren't numeric, a sample settles those quickly
+    if not text.head(SAMPLE_SIZE * 20).str.fullmatch(NUMERIC_TEXT).all():
+        return "string"
+    numeric = pd.to_numeric(text, errors="coerce")
+    if numeric.isna().any():
+        return "string"
+    return "integer" if pd.api.types.is_integer_dtype(numeric) else "floating"
+
+
+def normalize_keys(values: pd.Series, kind: str = None) -> pd.Series:
+    """Vectorized transform.normalize_key, returning None for missing keys"""
+    kind = kind or key_kind(values)
+    if pd.api.types.infer_dtype(values, skipna=True) == "string":
+        result = values.where(values != "", None)
+        # Text such as "1.0" becomes "1", matching integer keys
+        dotted = result.str.contains(".", regex=False).fillna(False).astype(bool)
+        if dotted.any():
+            result[dotted] = [normalize_text_key(value) for value in result[dotted]]
+    elif kind in ("integer", "floating", "mixed-integer-float"):
+        numeric = pd.to_numeric(values, errors="coerce")
+        if pd.api.types.is_integer_dtype(numeric):
+            result = numeric.astype(str).astype(object)
+        else:
+            # Floats hold integers exactly below 2**53; larger, non-finite and
+            # fractional values are left to normalize_key itself
+            integral = (numeric.abs() < 2**53) & (np.floor(numeric) == numeric)
+            result = pd.Series(None, index=values.index, dtype=object)
+            result[integral] = numeric[integral].astype("int64").astype(str)
+            rest = ~integral & values.notna()
+            result[rest] = values[rest].map(normalize_key)
+    else:
+        result = values.map(normalize_key)
+    return result.where(values.notna(), None)
+
+
+def _sample(values: pd.Series) -> List[Any]:
+    return values.drop_duplicates().head(SAMPLE_SIZE).tolist()
+
+
+def validate_data(data: Dict[str, List[Dict]], schema: Dict[str, List[Dict]]) -> Dict[str, Any]:
+    """
+    Check referential integrity and key quality of extracted data before building
+
+    Uses set-based anti-joins over whole key columns to find null and
+    duplicate primary keys, dangling edge endpoints and key columns whose
+    value types differ between node and edge files (e.g. 1 vs 1.0). Keys are
+    compared after the same normalization build_graph applies.
+
+    Args:
+        data: Extracted data, as returned by extract.read_zip
+        schema: Graph schema
+
+    Returns:
+        Dictionary with a "valid" flag, a list of human readable "issues",
+        and per node and edge type details
+    """
+    with metrics.stage("validate.validate_data") as timer:
+        report = _validate(data, schema)
+        timer.add(items=sum(len(records) for records in data.values()))
+    return report
+
+
+def _validate(data: Dict[str, List[Dict]], schema: Dict[str, List[Dict]]) -> Dict[str, Any]:
+    normalized_data = {normalize_type(k): v for k, v in data.items()}
+    issues = []
+    node_reports = {}
+    edge_reports = {}
+    node_keys = {}
+    node_key_kinds = {}
+
+    for node_schema in schema["nodes"]:
+        node_type = node_schema["type"]
+        pk_field = node_schema["id"]
+        records = normalized_data.get(node_type)
+        if records is None:
+            issues.append(f"Node type '{node_type}': no data file")
+            continue
+
+        raw = _key_series(records, pk_field)
+        kind = key_kind(raw)
+        keys = normalize_keys(raw, kind)
+        null_mask = keys.isna()
+        duplicated = keys[~null_mask & keys.duplicated(keep=False)]
+
+        node_keys[node_type] = set(keys[~null_mask])
+        node_key_kinds[node_type] = kind
+        node_reports[node_type] = {
+            "rows": len(records),
+            "null_keys": int(null_mask.sum()),
+            "duplicate_keys": int(duplicated.nunique()),
+            "duplicate_rows": int(len(duplicated)),
+            "duplicate_sample": _sample(duplicated),
+            "key_kind": kind,
+        }
+
+        if node_reports[node_type]["null_keys"]:
+            issues.append(
+                f"Node type '{node_type}': {node_reports[node_type]['null_keys']} rows with a missing '{pk_field}' key"
+            )
+        if node_reports[node_type]["duplicate_keys"]:
+            issues.append(
+                f"Node type '{node_type}': {node_reports[node_type]['duplicate_keys']} duplicated '{pk_field}' keys, "
+                f"e.g. {node_reports[node_type]['duplicate_sample']}"
+            )
+
+    for edge_schema in schema["edges"]:
+        edge_type = edge_schema["type"]
+        records = normalized_data.get(edge_type)
+        if records is None:
+            issues.append(f"Edge type '{edge_type}': no data file")
+            continue
+        if not records:
+            edge_reports[edge_type] = {"rows": 0}
+            continue
+
+        columns = list(records[0].keys())
+        if len(columns) < 2:
+            issues.append(f"Edge type '{edge_type}': fewer than two columns")
+            continue
+
+        edge_report = {"rows": len(records)}
+        endpoints = [
+            ("source", edge_schema.get("source_key") or columns[0], edge_schema["source_node_type"]),
+            ("target", edge_schema.get("target_key") or columns[1], edge_schema["target_node_type"]),
+        ]
+        dangling_rows = pd.Series(False, index=range(len(records)))
+
+        for side, column, node_type in endpoints:
+            raw = _key_series(records, column)
+            kind = key_kind(raw)
+            keys = normalize_keys(raw, kind)
+            null_mask = keys.isna()
+            dangling_mask = ~null_mask & ~keys.isin(node_keys.get(node_type, set()))
+            dangling_rows |= null_mask | dangling_mask
+
+            edge_report[side] = {
+                "column": column,
+                "node_type": node_type,
+                "null_keys": int(null_mask.sum()),
+                "dangling": int(dangling_mask.sum()),
+                "dangling_sample": _sample(keys[dangling_mask]),
+                "key_kind": kind,
+            }
+
+            if edge_report[side]["null_keys"]:
+                issues.append(
+                    f"Edge type '{edge_type}': {edge_report[side]['null_keys']} rows with a missing {side} key '{column}'"
+                )
+            if edge_report[side]["dangling"]:
+                issues.append(
+                    f"Edge type '{edge_type}': {edge_report[side]['dangling']} {side} keys not found in "
+                    f"'{node_type}', e.g. {edge_report[side]['dangling_sample']}"
+                )
+            node_kind = node_key_kinds.get(node_type)
+            if node_kind and kind != "empty" and node_kind != "empty" and kind != node_kind:
+                issues.append(
+                    f"Edge type '{edge_type}': {side} key '{column}' holds {kind} values "
+                    f"but '{node_type}' keys hold {node_kind} values"
+                )
+
+        edge_report["dropped_rows"] = int(dangling_rows.sum())
+        edge_reports[edge_type] = edge_report
+
+    return {
+        "valid": not issues,
+        "issues": issues,
+        "nodes": node_reports,
+        "edges": edge_reports,
+    }